@@ -1,7 +1,22 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# background listener doing formatting and I/O (off the request path)
+_listener: Optional[QueueListener] = None
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def configure_logging(level: int = logging.INFO) -> None:
+    global _listener
     root = logging.getLogger()
     root.setLevel(level)
     root.propagate = False
@@ -9,6 +24,7 @@ def configure_logging(level: int = logging.INFO) -> None:
     # vorhandene Handler entfernen
     for h in list(root.handlers):
         root.removeHandler(h)
+    _stop_listener()
 
     handler = logging.StreamHandler()
     handler.setLevel(level)
@@ -18,8 +34,23 @@ def configure_logging(level: int = logging.INFO) -> None:
             datefmt="%Y-%m-%d %H:%M:%S",
         )
     )
-    root.addHandler(handler)
+
+    # emit on hot path = enqueue only; stream handler runs in listener thread
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+    # ---- cheaper log records (thread/process info not used in format) ----
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging.captureWarnings(True)
 
     # ---- silence noisy libs ----
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
+
+
+# flush pending records on interpreter shutdown
+atexit.register(_stop_listener)
@@ -1,28 +1,47 @@
 import logging
-from typing import List
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
 
-from agents.api.utils import assemble_agent, use_test_agent
+from agents.api.utils import assemble_agent, buffered_stream, prepare_stream_request, use_test_agent
 from agents.factory.factory import RunnableAgent
 from agents.mcp_client.client import MCPClient
-from agents.models.api import GetToolsRequest, StreamAgentRequest, ChatMessage
+from agents.models.api import GetToolsRequest, PreparedStreamRequest, ChatMessage
+from agents.models.client import OpenAITool
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
 load_dotenv()
 
-app = FastAPI()
+# /stream-test serves the prebuilt test agent (instead of assembling one from the payload)
+TEST_AGENTS_AS_TOOL: bool = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Build (compile) test agent once at startup, so first request does not pay for it."""
+    if TEST_AGENTS_AS_TOOL:
+        app.state.test_agent = use_test_agent()
+        logger.info("[API] Test agent built at startup.")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+# built once; serializes complete tool list in one pass
+TOOL_LIST_ADAPTER: TypeAdapter[List[OpenAITool]] = TypeAdapter(List[OpenAITool])
+
+# frontend origins (localhost, port 3000); pattern is compiled once by CORSMiddleware
+ALLOWED_ORIGIN_REGEX: str = r"^http://(localhost|127\.0\.0\.1):3000$"
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-    ],
+    allow_origin_regex=ALLOWED_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -33,30 +52,31 @@ app.add_middleware(
 async def get_tools(req: GetToolsRequest):
     """Excample for input: http://127.0.0.1:8000/sse."""
     server_url = req.server_url
+    # one-off connection: server url comes from the caller, so no persistent session is kept for it
     client = MCPClient(mcp_server_endpoint=server_url)
     tools = await client.get_tools()
-    
-    dumped_tools = [tool.model_dump() for tool in tools]
-    json_response = JSONResponse(content=dumped_tools)
+
+    dumped_tools: bytes = TOOL_LIST_ADAPTER.dump_json(tools)
+    json_response = Response(content=dumped_tools, media_type="application/json")
     return json_response
 
 ###################################################################### CALL AGENT
 
-TEST_AGENTS_AS_TOOL: bool = True
-
 @app.post("/stream-test")
-async def stream_test(payload: StreamAgentRequest):
+async def stream_test(payload: PreparedStreamRequest = Depends(prepare_stream_request)):
     # Plain text stream
     messages: List[ChatMessage]
     agent: RunnableAgent
     try:
         messages = payload.messages
         if TEST_AGENTS_AS_TOOL:
-            agent = use_test_agent()
+            # built at startup; fallback if lifespan did not run (e.g. some test clients)
+            agent = getattr(app.state, "test_agent", None) or use_test_agent()
         else:
-            agent = assemble_agent(payload)
+            agent = assemble_agent(payload.complete_config)
         stream = StreamingResponse(
-            agent.outer_astream(messages),
+            # bounded buffer: agent run is not coupled record by record to the client's read speed
+            buffered_stream(agent.outer_astream(messages)),
             media_type="application/x-ndjson",
         )
     except Exception as error:
@@ -69,9 +89,15 @@ async def stream_test(payload: StreamAgentRequest):
 
 if __name__ == "__main__":
     import uvicorn
+
+    # reload (file watcher, single process) only for development
+    reload: bool = os.getenv("API_RELOAD", "false").lower() == "true"
     uvicorn.run(
         "agents.api.api:app",
         host="127.0.0.1",
         port=3001,
-        reload=True,
+        loop="auto",  # uvloop, if installed
+        http="auto",  # httptools, if installed
+        workers=None if reload else int(os.getenv("WEB_CONCURRENCY", "2")),
+        reload=reload,
     )
\ No newline at end of file
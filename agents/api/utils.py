@@ -1,97 +1,206 @@
-from typing import List
+import asyncio
+import contextlib
+import functools
+import hashlib
+from collections import OrderedDict
+from typing import AsyncGenerator, List
 
 from agents.containers.subagents import AgentAsToolContainer
 from agents.factory.factory import AgentFactory, RunnableAgent
 from agents.models.agents import AgentBehaviourConfig, CompleteAgentConfig
-from agents.models.api import StreamAgentRequest
+from agents.models.api import PreparedStreamRequest, StreamAgentRequest
 from agents.models.tools import ToolSchema
 from tests.schemas import schema_add, schema_birthday, schema_shopping_list, schema_structured_pydantic, schema_structured_dict
 
+# one factory shared by all requests (stateless apart from llm handle)
+_FACTORY: AgentFactory = AgentFactory()
 
-def assemble_agent(payload: StreamAgentRequest) -> RunnableAgent:
-    """Assemlbes factory agent from frontend payload."""
+# agents built from identical configs are reused (LRU, keyed by name and config content hash)
+AGENT_CACHE_SIZE: int = 128
+_agent_cache: OrderedDict[str, RunnableAgent] = OrderedDict()
+
+
+def _config_hash(complete_config: CompleteAgentConfig) -> str:
+    """Content hash of config. Subagents (tool objects, not serializable) enter by identity."""
+    dumped = complete_config.model_dump_json(exclude={"subagents"})
+    subagent_ids = ",".join(str(id(subagent)) for subagent in complete_config.subagents)
+    return hashlib.blake2b(f"{dumped}|{subagent_ids}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _charge_cached(name: str, complete_config: CompleteAgentConfig) -> RunnableAgent:
+    """Return cached agent for name and config, build (and cache) it if missing."""
+    key = f"{name}|{_config_hash(complete_config)}"
+    agent = _agent_cache.get(key)
+    if agent is not None:
+        _agent_cache.move_to_end(key)
+        return agent
+
+    agent = _FACTORY._charge_runnable_agent(
+        name=name,
+        complete_config=complete_config
+    )
+    _agent_cache[key] = agent
+    if len(_agent_cache) > AGENT_CACHE_SIZE:
+        _agent_cache.popitem(last=False)
+    return agent
+
+
+# NDJSON records buffered between agent run and http client (bounded: a slow client pauses the run instead of growing memory)
+STREAM_BUFFER_SIZE: int = 64
+# records already waiting in the buffer are sent as one body chunk, up to this size (NDJSON framing survives concatenation)
+STREAM_COALESCE_BYTES: int = 4096
+_END_OF_STREAM = object()
+
+
+async def buffered_stream(
+    source: AsyncGenerator[bytes, None], maxsize: int = STREAM_BUFFER_SIZE
+) -> AsyncGenerator[bytes, None]:
+    """Decouple agent run (producer task) from http client (consumer) via a bounded queue.
+
+    The run keeps going while the client drains up to maxsize records. Records that are already queued
+    are coalesced into one chunk (up to STREAM_COALESCE_BYTES), never waiting for more, so a busy run costs
+    fewer ASGI sends without delaying single records. Errors of the run are re-raised to the consumer;
+    if the consumer stops early (client disconnect), the run is cancelled.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def produce() -> None:
+        try:
+            async for record in source:
+                await queue.put(record)
+        except Exception:
+            await queue.put(_END_OF_STREAM)
+            raise
+        finally:
+            await source.aclose()
+        await queue.put(_END_OF_STREAM)
+
+    producer = asyncio.create_task(produce())
+    try:
+        get_nowait = queue.get_nowait
+        finished = False
+        while not finished:
+            record = await queue.get()
+            if record is _END_OF_STREAM:
+                break
+            batch = [record]
+            size = len(record)
+            # drain what the run has produced meanwhile (no waiting)
+            while size < STREAM_COALESCE_BYTES and not queue.empty():
+                record = get_nowait()
+                if record is _END_OF_STREAM:
+                    finished = True
+                    break
+                batch.append(record)
+                size += len(record)
+            yield batch[0] if len(batch) == 1 else b"".join(batch)
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await producer
+
+
+def prepare_stream_request(payload: StreamAgentRequest) -> PreparedStreamRequest:
+    """FastAPI dependency: wraps validated frontend payload into complete agent config once, at request ingress."""
     agent_config: AgentBehaviourConfig = payload.agent_config
     tool_schemas: List[ToolSchema] = payload.tool_schemas
-    agent_reg_entry = CompleteAgentConfig(
+    # fields already validated by FastAPI -> no second validation
+    complete_config = CompleteAgentConfig.model_construct(
         description=agent_config.description,
         behaviour_config=agent_config,
         tool_schemas=tool_schemas
     )
-    factory = AgentFactory()
-    agent = factory._charge_runnable_agent(
+    return PreparedStreamRequest.model_construct(
+        messages=payload.messages,
+        complete_config=complete_config,
+    )
+
+
+def assemble_agent(complete_config: CompleteAgentConfig) -> RunnableAgent:
+    """Assemlbes factory agent from prepared frontend config."""
+    return _charge_cached(
         name="Test",
-        complete_config=agent_reg_entry
+        complete_config=complete_config
     )
-    return agent
 
 
-def use_test_agent() -> RunnableAgent:
-    ###################################################### setup inner agent (CONFIGURATION! FROM THIS, ACTUAL AGENT OBJECT WILL BE BUILT!)
-    inner_agent_configuration = CompleteAgentConfig(
-            description="""Inner agent.
-            
-            CAPABILITIES:
-            Has a tool to add numbers.
-            Has a tool to give Santas birth year.
-
-            RECEIVES QUERY AS INPUT:
-            Feed this inner agent a query that reflects the user's questions.
-            You can use one query with all the subquestions of the user. The inner agent is able to use his capabilities to make work on his own subtasks.
-            You can also call him multiple times, each time with a dedicated subquery to answer parts of the user question.
-            
-            USE WHEN:
-            Use when user explicitly asks for info from inner agent
-            Use when the capabilities might help to answer the user questions.
-
-            RETURNS:
-            Returns an answer on the specific query you asked.
-            """,
-            behaviour_config=AgentBehaviourConfig(
-                name="one_shot_tooling_with_retrieval",
-                description="""Inner agent. Useful for arithmetic operations like adding numbers.""",
-                system_prompt="Use your tools to answer the user query",
-                only_one_model_call=False,
-                toolbased_answer_prompt="Summarize your toolcall results in a nice and fancy catch phrase!",
-                direct_answer_prompt="""If no tools are suitable to help answering the user query:
-                - Politely tell the user, that you cannot answer this questions based on your capabilities (tools)."""
-            ),
-            tool_schemas=[schema_add, schema_birthday],
-        )
+###################################################### test agents (CONFIGURATION! FROM THIS, ACTUAL AGENT OBJECTS WILL BE BUILT!)
+# constant configs, validated once at import
 
+###################################################### setup inner agent
+_INNER_CFG = CompleteAgentConfig(
+    description="""Inner agent.
+    
+    CAPABILITIES:
+    Has a tool to add numbers.
+    Has a tool to give Santas birth year.
+
+    RECEIVES QUERY AS INPUT:
+    Feed this inner agent a query that reflects the user's questions.
+    You can use one query with all the subquestions of the user. The inner agent is able to use his capabilities to make work on his own subtasks.
+    You can also call him multiple times, each time with a dedicated subquery to answer parts of the user question.
+    
+    USE WHEN:
+    Use when user explicitly asks for info from inner agent
+    Use when the capabilities might help to answer the user questions.
+
+    RETURNS:
+    Returns an answer on the specific query you asked.
+    """,
+    behaviour_config=AgentBehaviourConfig(
+        name="one_shot_tooling_with_retrieval",
+        description="""Inner agent. Useful for arithmetic operations like adding numbers.""",
+        system_prompt="Use your tools to answer the user query",
+        only_one_model_call=False,
+        toolbased_answer_prompt="Summarize your toolcall results in a nice and fancy catch phrase!",
+        direct_answer_prompt="""If no tools are suitable to help answering the user query:
+        - Politely tell the user, that you cannot answer this questions based on your capabilities (tools)."""
+    ),
+    tool_schemas=[schema_add, schema_birthday],
+)
+
+###################################################### setup outer agent (subagents are attached when building)
+_OUTER_CFG = CompleteAgentConfig(
+    description="""Outer agent.
+    Can call inner agent.""",
+    behaviour_config=AgentBehaviourConfig(
+        name="one_shot_tooling_with_retrieval",
+        description="""Outer agent.""",
+        system_prompt="""Use your tools to answer the user query:
+        - you might call the inner agent.
+        - you can use the other tools as well.
+        - If no tool mathes, let the user know. Also let him know, if you need inputs that are not given.""",
+        only_one_model_call=False,
+        toolbased_answer_prompt="""Summarize your tooling responses. 
+        If you have received infos from a sub agent, cite him and make clear what he  told you!""",
+        direct_answer_prompt="""If no tools are suitable to help answering the user query:
+        - Politely tell the user, that you cannot answer this questions based on your capabilities (tools).""",
+    ),
+    tool_schemas=[schema_shopping_list, schema_structured_pydantic, schema_structured_dict],
+)
+
+
+@functools.lru_cache(maxsize=1)
+def use_test_agent() -> RunnableAgent:
     ###################################################### get ConfiguredAgent
-    factory = AgentFactory()
-    inner_agent: RunnableAgent = factory._charge_runnable_agent(
+    inner_agent: RunnableAgent = _FACTORY._charge_runnable_agent(
         name="INNER",
-        complete_config=inner_agent_configuration
+        complete_config=_INNER_CFG
     )
 
     subagents = AgentAsToolContainer(
         agents = [inner_agent]
     )
 
-    ###################################################### setup outer agent (CONFIGURATION! FROM THIS, ACTUAL AGENT OBJECT WILL BE BUILT!)
-    outer_agent_configuration = CompleteAgentConfig(
-        description="""Outer agent.
-        Can call inner agent.""",
-        behaviour_config=AgentBehaviourConfig(
-            name="one_shot_tooling_with_retrieval",
-            description="""Outer agent.""",
-            system_prompt="""Use your tools to answer the user query:
-            - you might call the inner agent.
-            - you can use the other tools as well.
-            - If no tool mathes, let the user know. Also let him know, if you need inputs that are not given.""",
-            only_one_model_call=False,
-            toolbased_answer_prompt="""Summarize your tooling responses. 
-            If you have received infos from a sub agent, cite him and make clear what he  told you!""",
-            direct_answer_prompt="""If no tools are suitable to help answering the user query:
-            - Politely tell the user, that you cannot answer this questions based on your capabilities (tools).""",
-        ),
-        tool_schemas=[schema_shopping_list, schema_structured_pydantic, schema_structured_dict],
-        subagents = list(subagents.subagents.values())
+    ###################################################### setup outer agent (subagents are attached to validated constant config)
+    outer_agent_configuration = _OUTER_CFG.model_copy(
+        update={"subagents": list(subagents.subagents.values())}
     )
 
-    outer_agent: RunnableAgent = factory._charge_runnable_agent(
+    outer_agent: RunnableAgent = _FACTORY._charge_runnable_agent(
         name="OUTER",
         complete_config=outer_agent_configuration
     )
-    return outer_agent
\ No newline at end of file
+    return outer_agent
@@ -1,31 +1,99 @@
-import asyncio
+import functools
 import inspect
 import logging
-from typing import Any, Awaitable, Callable, Dict, List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from langchain_core.tools.structured import StructuredTool
-from mcp.types import CallToolResult, TextContent
+from mcp.types import CallToolResult
 
-from agents.mcp_client.client import MCPClient
+from agents.mcp_client.registry import (
+    MCP_LOOP,
+    get_connection,
+)
 from agents.models.agents import MiscMarkers
 from agents.models.client import MCPToolDecision
 from agents.models.tools import (
     DROP_EMPTY_DEFAULTS_MARKER,
-    ToolArg,
     ToolSchema,
 )
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# sentinel for absent llm args (None may be a provided value)
+_MISSING = object()
+
+# returned to the agent instead of the result of a failed toolcall
+_TOOL_ERROR_MARKER: str = MiscMarkers.POSTPROCESSING_ERRORMARKER.value
+
+
+# precomputed mapping of one llm arg: (name_for_llm, name_on_server, required, default or _MISSING)
+_ArgMapping = Tuple[str, str, bool, Any]
+
+
+def _make_arg_mapper(arg_mappings: Tuple[_ArgMapping, ...]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Return function that maps LLM-provided arguments to the full server-side argument dict of one tool.
+
+    Args:
+        arg_mappings (Tuple[_ArgMapping, ...]): Precomputed argument mapping of the tool (see _build_arg_mappings).
+
+    Returns:
+        Callable[[Dict[str, Any]], Dict[str, Any]]: Maps actual runtime llm kwargs to server arg names and final values;
+            raises ValueError if a required LLM argument is missing.
+    """
+
+    def map_server_args(llm_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        server_args: Dict[str, Any] = {}
+        get_llm_value = llm_kwargs.get
+
+        for name_for_llm, name_on_server, required, default in arg_mappings:
+            # Case 1: LLM provided value -> always forward to server (single lookup)
+            llm_value = get_llm_value(name_for_llm, _MISSING)
+            if llm_value is not _MISSING:
+                server_args[name_on_server] = llm_value
+
+            # Case 2: LLM did not provide required value -> error
+            elif required:
+                raise ValueError(
+                    f"[MCP EXECUTABLE] Missing required LLM argument '{name_for_llm}'."
+                )
+
+            # Case 3: LLM did not provide optional arg -> schema default, unless server fills it (DROP marker)
+            elif default is not _MISSING:
+                server_args[name_on_server] = default
+
+        return server_args
+
+    return map_server_args
+
+
+@functools.lru_cache(maxsize=1024)
+def _signature_for(shape: Tuple[Tuple[str, bool, Optional[str]], ...]) -> inspect.Signature:
+    """Signature of tool functions per argument shape (name_for_llm, required, default). Signatures are immutable -> shared."""
+    parameters = [inspect.Parameter("self", inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+
+    for name_for_llm, required, default in shape:
+        parameters.append(
+            inspect.Parameter(
+                name=name_for_llm,
+                kind=inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                default=inspect._empty if required else default,
+                annotation=str,
+            )
+        )
+
+    return inspect.Signature(parameters)
+
 
 class MCPToolContainer:
     """Container class that builds executable langchain StructuredTools for langchain agent.
 
     Builds such tools from given tool schema:
       - builds core function (mcp-caller) with constructed signature according to schema
-      - wraps constructed core function in sync process (to secure after-agent debugging with breaking points)
+      - wraps constructed core function in sync process (to secure after-agent debugging with breaking points),
+        executed on a shared background event loop
       - stores readymade StructuredTool objects in class state, along with raw tools for manual calls (tests)
+      - calls tools over the process-wide persistent MCP session of their server (see agents.mcp_client.registry)
     """
 
     def __init__(
@@ -47,8 +115,9 @@ class MCPToolContainer:
             # store in state
             self.tools_raw[schema.name_for_llm] = bound_core
 
-            # build sync wrapper
+            # build sync wrapper (sync invocation) and async wrapper (native path of async agents)
             sync_wrapper = self._make_sync_wrapper(bound_core)
+            async_wrapper = self._make_async_wrapper(bound_core)
 
             # build args schema for llm
             args_schema = schema.get_args_schema_for_llm()
@@ -58,18 +127,34 @@ class MCPToolContainer:
                 name=schema.name_for_llm,
                 description=schema.description_for_llm,
                 func=sync_wrapper,
+                coroutine=async_wrapper,
                 args_schema=args_schema,
             )
 
             # store in state
             self.tools_agent[schema.name_for_llm] = tool
 
+    def _make_async_wrapper(self, async_func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """Create the native async entry point of an MCP tool function for async agent runs (ainvoke/astream).
+
+        LangChain awaits it directly (no worker thread per call; parallel toolcalls of one step run concurrently).
+        The call itself is executed on the shared mcp loop, where the persistent MCP sessions live,
+        and awaited from the caller's loop without blocking it. Cancelling the agent run cancels the call.
+        """
+
+        @functools.wraps(async_func)
+        async def wrapper(*args, **kwargs):
+            return await MCP_LOOP.arun(async_func(*args, **kwargs))  # type: ignore[arg-type]
+
+        return wrapper
+
     def _make_sync_wrapper(self, async_func: Callable[..., Awaitable[Any]]) -> Callable[..., Any]:
         """Create a synchronous wrapper around an asynchronous MCP tool function.
 
         This wrapper enables synchronous execution of dynamically generated async MCP executables,
         ensuring they can be used seamlessly in environments (such as LangChain tools) that do not
-        support async functions. Internally it runs the async function via asyncio.run().
+        support async functions. Internally it runs the async function on a persistent background
+        event loop (no event loop setup and teardown per tool call).
 
         Args:
             async_func (Callable[..., Awaitable[Any]]): The asynchronous MCP execution function
@@ -81,82 +166,100 @@ class MCPToolContainer:
         """
 
         def wrapper(*args, **kwargs):
-            import asyncio
-
-            return asyncio.run(async_func(*args, **kwargs))  # type: ignore[arg-type]
+            return MCP_LOOP.run(async_func(*args, **kwargs))  # type: ignore[arg-type]
 
         return wrapper
 
     def _build_signature(self, schema: ToolSchema) -> inspect.Signature:
-        """Construct the Python signature for the LLM-facing tool function."""
-        parameters = [inspect.Parameter("self", inspect.Parameter.POSITIONAL_OR_KEYWORD)]
-
-        llm_args = schema.get_args()
-
-        for arg in llm_args:
-            default = inspect._empty if arg.required else arg.default
-            parameters.append(
-                inspect.Parameter(
-                    name=arg.name_for_llm,
-                    kind=inspect.Parameter.POSITIONAL_OR_KEYWORD,
-                    default=default,
-                    annotation=str,
-                )
-            )
-
-        return inspect.Signature(parameters)
+        """Construct the Python signature for the LLM-facing tool function (shared by identically shaped tools)."""
+        shape = tuple(
+            (arg.name_for_llm, arg.required, arg.default) for arg in schema.get_args()
+        )
+        return _signature_for(shape)
 
-    def _construct_complete_server_args(
-        self, schema: ToolSchema, llm_kwargs: Dict[str, str]
-    ) -> Dict[str, str]:
-        """Construct the full dictionary of server-side arguments required for the MCP call.
+    def _build_arg_mappings(self, schema: ToolSchema) -> Tuple[_ArgMapping, ...]:
+        """Resolve the LLM→server argument mapping of a schema once, at build time.
 
-        This method maps LLM-provided arguments to their server-side equivalents.
+        Schema is immutable, hence defaults and DROP markers are resolved here instead of per call.
 
         Args:
             schema (ToolSchema): The schema defining both LLM-facing and server-facing argument metadata.
-            llm_kwargs (Dict[str, str]): Actual runtime values passed from the LLM during invocation.
 
         Returns:
-            Dict[str, str]: A dictionary mapping server-side argument names to their final values.
+            Tuple[_ArgMapping, ...]: One (name_for_llm, name_on_server, required, default) entry per LLM arg;
+                default is _MISSING if the server arg is omitted when the LLM does not provide it.
         """
-        # get llm args
-        llm_args: List[ToolArg] = schema.get_args()
-
-        # build dict that maps llm args on server args -> empty vessel first
-        constructed_server_args: Dict[str, str] = {}
-
-        #################################### fill in args that are provided by llm
-        logger.debug("[TOOL ARG CONSTRUCTION] Insert args provided by llm")
-        for arg in llm_args:
-            # Case 1: LLM provided value -> always forward to server
-            if arg.name_for_llm in llm_kwargs:
-                constructed_server_args[arg.name_on_server] = llm_kwargs[arg.name_for_llm]
-                continue
-
-            # Case 2: LLM did not provide required value -> error
+        arg_mappings: List[_ArgMapping] = []
+        for arg in schema.get_args():
+            # required arg: no default needed (missing value is an error per call)
             if arg.required:
-                raise ValueError(
-                    f"[MCP EXECUTABLE] Missing required LLM argument '{arg.name_for_llm}'."
-                )
+                arg_mappings.append((arg.name_for_llm, arg.name_on_server, True, _MISSING))
+                continue
 
-            # Case 3.1: LLM did not provide optional arg, and server fills it -> dont include
+            # optional arg, server fills it -> dont include
             if arg.default == DROP_EMPTY_DEFAULTS_MARKER:
                 logger.debug(
-                    f"[TOOL DEFAULT DROP] Omitting server arg '{arg.name_on_server}' because "
-                    f"default is DROP marker ({DROP_EMPTY_DEFAULTS_MARKER!r})."
+                    "[TOOL DEFAULT DROP] Server arg '%s' is omitted if not provided, because default is DROP marker (%r).",
+                    arg.name_on_server,
+                    DROP_EMPTY_DEFAULTS_MARKER,
                 )
+                arg_mappings.append((arg.name_for_llm, arg.name_on_server, False, _MISSING))
                 continue
 
-            # Case 3.2: LLM did not provide optional arg, and schema fills it -> include
+            # optional arg, schema fills it -> include
             if arg.default is None:
                 raise ValueError(
                     f"[MCP EXECUTABLE] Optional argument '{arg.name_for_llm}' has no default "
                     "despite required=False. Schema inconsistent."
                 )
-            constructed_server_args[arg.name_on_server] = arg.default
+            arg_mappings.append((arg.name_for_llm, arg.name_on_server, False, arg.default))
+
+        return tuple(arg_mappings)
+
+    def _validate_arg_mappings(
+        self, schema: ToolSchema, arg_mappings: Tuple[_ArgMapping, ...]
+    ) -> None:
+        """Verify once at build time that the argument mapping can satisfy the server tool signature.
 
-        return constructed_server_args
+        Every required server arg must be produced on each call (required LLM arg or schema default),
+        and the mapping must not produce server args unknown to the schema.
+
+        Args:
+            schema (ToolSchema): The schema specifying required server-side argument names.
+            arg_mappings (Tuple[_ArgMapping, ...]): Precomputed argument mapping of the tool.
+
+        Returns:
+            None: Raises ValueError when a required server arg is not guaranteed.
+        """
+        all_server_names = {inp.name_on_server for inp in schema.args_schema.properties}
+        required_server_names = {
+            inp.name_on_server for inp in schema.args_schema.properties if inp.required
+        }
+        always_produced = {
+            name_on_server
+            for _, name_on_server, required, default in arg_mappings
+            if required or default is not _MISSING
+        }
+        producible = {name_on_server for _, name_on_server, _, _ in arg_mappings}
+
+        missing_required = required_server_names - always_produced
+        extra = producible - all_server_names
+
+        if missing_required:
+            raise ValueError(
+                f"[MCP EXECUTABLE ERROR] Required server args not reachable from tool {schema.name_for_llm}.\n"
+                f"Required server args: {required_server_names}\n"
+                f"Always produced:      {always_produced}\n"
+                f"Missing required:     {missing_required}"
+            )
+
+        if extra:
+            logger.warning(
+                "[TOOL MAP CHECK] Unexpected extra server args in mapping: %s for tool %s.",
+                extra,
+                schema.name_for_llm,
+            )
+        return None
 
     def _validate_final_server_args(
         self, schema: ToolSchema, constructed_server_args: Dict[str, Any]
@@ -194,8 +297,9 @@ class MCPToolContainer:
 
         if extra:
             logger.warning(
-                f"[TOOL MAP CHECK] Unexpected extra server args detected: {extra} "
-                f"for tool {schema.name_for_llm}."
+                "[TOOL MAP CHECK] Unexpected extra server args detected: %s for tool %s.",
+                extra,
+                schema.name_for_llm,
             )
 
         logger.info("[TOOL MAP CHECK] All required server arguments successfully provided.")
@@ -218,6 +322,15 @@ class MCPToolContainer:
         # use active args
         llm_args = schema.get_args()
 
+        ############################### precompute everything that depends on the (immutable) schema only
+        tool_name = schema.name_for_llm
+        server_tool_name = schema.name_on_server
+        server_arg_names = schema.get_all_server_arg_names()
+        arg_mappings = self._build_arg_mappings(schema)
+        self._validate_arg_mappings(schema=schema, arg_mappings=arg_mappings)
+        map_server_args = _make_arg_mapper(arg_mappings)
+        server_url = schema.server_url
+
         ############################### create signature
         signature: inspect.Signature = self._build_signature(schema=schema)
 
@@ -237,51 +350,50 @@ class MCPToolContainer:
             ###################### start with info logging
 
             logger.info(
-                f"[TOOL START] {schema.name_for_llm} | "
-                f"Signature={mcp_executable.__signature__} | "  # type: ignore[attr-defined]
-                f"Server args={schema.get_all_server_arg_names()} | "
-                f"llm args={kwargs}"
+                "[TOOL START] %s | Signature=%s | Server args=%s | llm args=%s",
+                tool_name,
+                signature,
+                server_arg_names,
+                kwargs,
             )
 
             ###################### construct server-args dict
-            constructed_server_args = self._construct_complete_server_args(
-                schema=schema,
-                llm_kwargs=kwargs,
-            )
+            constructed_server_args = map_server_args(kwargs)
 
             ###################### check, if constructed args comply to server tool signature
-            self._validate_final_server_args(
-                schema=schema, constructed_server_args=constructed_server_args
-            )
+            # guaranteed by mapping (validated at build time) -> per-call re-check only for debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                self._validate_final_server_args(
+                    schema=schema, constructed_server_args=constructed_server_args
+                )
 
-            logger.info(f"[TOOL MAP] {schema.name_for_llm} LLM→SERVER = {constructed_server_args}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("[TOOL MAP] %s LLM→SERVER = %s", tool_name, constructed_server_args)
 
             ###################### call mcp tool
-            mcp_client = MCPClient(mcp_server_endpoint=schema.server_url)
-            await mcp_client.connect()
-
             toolcall = MCPToolDecision(
-                name=schema.name_on_server,
+                name=server_tool_name,
                 args=constructed_server_args,
                 id="auto",
             )
 
-            result_list: List[CallToolResult] = await mcp_client.call_tools([toolcall])
-            await mcp_client.close()
-            tool_result: CallToolResult = result_list[0]
-            logger.info(f"[TOOL RESULT] {schema.name_for_llm} received raw MCP response")
-            assert isinstance(tool_result.content[0], TextContent)
+            # persistent session of this server (no connect/close handshake per call)
+            tool_result: CallToolResult
+            # looked up per call: the registry is bounded and may have evicted (closed) an older connection
+            (tool_result,) = await get_connection(server_url).call_tools([toolcall])
+            # content types (text only) are already asserted by MCPClient per toolcall
+            logger.info("[TOOL RESULT] %s received raw MCP response", tool_name)
 
             ###################### abort errors
             if tool_result.isError:
-                logger.error(f"[TOOL ERROR] {schema.name_for_llm} MCP toolcall resulted in error.")
-                return MiscMarkers.POSTPROCESSING_ERRORMARKER.value
+                logger.error("[TOOL ERROR] %s MCP toolcall resulted in error.", tool_name)
+                return _TOOL_ERROR_MARKER
 
             ###################### return structured content
             if tool_result.structuredContent is not None:
                 return tool_result.structuredContent
 
-            ###################### return regular content
+            ###################### return regular content (first content item; text only, see MCPClient)
             return tool_result.content[0].text
 
         ############################### set documentation and signature
@@ -296,10 +408,10 @@ class MCPToolContainer:
 
         ############################### log for transparency
         logger.info(
-            f"[BUILD TOOL] Constructed raw tool\n"
-            f"Tool: {schema.name_for_llm}\n"
-            f"Signature: {signature}\n"
-            f"Server args: {schema.get_all_server_arg_names()}\n"
+            "[BUILD TOOL] Constructed raw tool\nTool: %s\nSignature: %s\nServer args: %s\n",
+            schema.name_for_llm,
+            signature,
+            server_arg_names,
         )
 
         return mcp_executable
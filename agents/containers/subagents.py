@@ -1,6 +1,11 @@
 import asyncio
+import functools
 import logging
-from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Set, Union
+import os
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Coroutine, Dict, List, Mapping, Union
 
 from langchain.messages import (
     AIMessage,
@@ -10,22 +15,208 @@ from langchain.messages import (
 
 from langchain_core.tools.structured import StructuredTool
 from langgraph.config import get_stream_writer
+from pydantic import BaseModel
 from typing import Optional
-from agents.factory.factory import RunnableAgent
+from agents.containers.utils import BackgroundEventLoop, SubagentResultCache
+from agents.factory.utils import BoundedIdSet, toolcall_key
 from agents.models.stream import StreamEvent, StreamChunk, StreamLevel
 
+if TYPE_CHECKING:
+    # annotation only: importing factory pulls in llm client, langchain.agents and middleware
+    from agents.factory.factory import RunnableAgent
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+
+# max. number of concurrently running subagents per container (protects llm backend from rate limits)
+INNER_AGENT_CONCURRENCY: int = int(os.getenv("INNER_AGENT_CONCURRENCY", "8"))
+# waiting times for a free slot above this threshold (seconds) are logged
+INNER_AGENT_QUEUE_LOG_THRESHOLD: float = 1.0
+
+# event strings of inner stream chunks (plain str keys: no enum attribute/.value lookup or Enum.__hash__ per event)
+_EV_START: str = StreamEvent.START.value
+_EV_TOOL_REQUEST: str = StreamEvent.TOOL_REQUEST.value
+_EV_TOOL_RESULT: str = StreamEvent.TOOL_RESULT.value
+_EV_FINAL: str = StreamEvent.FINAL.value
+_EV_ABORTED: str = StreamEvent.ABORTED.value
+
+# one persistent loop (started on first sync tool call) shared by all containers
+_LOOP_THREAD = BackgroundEventLoop(name="subagents-loop")
+
+
+def _event_templates(subagent_name: str) -> Dict[str, Dict[str, Any]]:
+    """Prevalidate one dumped StreamChunk per event type of subagent (event, level and agent name frozen in)."""
+    return {
+        event.value: StreamChunk(
+            level=StreamLevel.INNER.value,
+            event=event.value,
+            agent_name=subagent_name,
+        ).model_dump(mode="json")
+        for event in StreamEvent
+    }
+
+
+def _stream_event(templates: Dict[str, Dict[str, Any]], event: str, **fields: Any) -> Dict[str, Any]:
+    """Build custom stream event (dumped StreamChunk) from prevalidated template, without model validation."""
+    return {**templates[event], **fields}
+
+
+@dataclass
+class _SubagentRun:
+    """State of one subagent run, shared by the stream handlers."""
+
+    subagent_name: str
+    writer: Callable[[Any], None]
+    event_templates: Dict[str, Dict[str, Any]]
+    emitted_toolcall_ids: BoundedIdSet = field(default_factory=BoundedIdSet)
+    last_seen_msg_ids: Dict[str, Any] = field(default_factory=dict)
+    # set once run is finished (validated answer or abortion marker)
+    result: Optional[str] = None
+    # validated answer (only set for converged runs)
+    final_answer: Optional[str] = None
+    # events of current inner stream item, written in one go by flush()
+    pending: List[Dict[str, Any]] = field(default_factory=list)
+
+    def emit(self, chunk: Dict[str, Any]) -> None:
+        """Buffer stream event (order preserved)."""
+        self.pending.append(chunk)
+
+    def flush(self) -> None:
+        """Write buffered events: single event as is, several events as one list (one writer call)."""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        self.writer(pending[0] if len(pending) == 1 else pending)
+
+
+def _emit_toolcall_requests(last: AIMessage, run: _SubagentRun) -> None:
+    emitted = run.emitted_toolcall_ids
+    already_emitted = emitted.__contains__
+    mark_emitted = emitted.add
+    for tc in last.tool_calls:
+        tc_id = toolcall_key(tc)
+        if already_emitted(tc_id):
+            continue
+        mark_emitted(tc_id)
+
+        chunk = _stream_event(run.event_templates, _EV_TOOL_REQUEST, toolcall_id=tc_id, tool_name=tc.get("name") or "unknown_tool")
+        run.emit(chunk)
+
+
+def _emit_toolcall_result(last: ToolMessage, run: _SubagentRun) -> None:
+    chunk = _stream_event(run.event_templates, _EV_TOOL_RESULT, tool_name=last.name, data=last.content)
+    run.emit(chunk)
+
+
+# dispatch on message type (other types carry no stream events)
+_MESSAGE_HANDLERS: Dict[type, Callable[[Any, _SubagentRun], None]] = {
+    AIMessage: _emit_toolcall_requests,
+    ToolMessage: _emit_toolcall_result,
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _message_handler(msg_type: type) -> Optional[Callable[[Any, _SubagentRun], None]]:
+    """Resolve handler for message type once (exact type first, then subclasses like AIMessageChunk via MRO)."""
+    for base in msg_type.__mro__:
+        handler = _MESSAGE_HANDLERS.get(base)
+        if handler is not None:
+            return handler
+    return None
+
+
+def _handle_custom(data: Any, run: _SubagentRun) -> None:
+    """Nested subagents (custom events of inner agent) are not forwarded."""
+    logger.info(f"[SUBAGENT {run.subagent_name}] Receiving nested stream.")
+
+
+def _handle_updates(data: Any, run: _SubagentRun) -> None:
+    """Updates in nodes and middleware: forward toolcalls, detect final answer or abortion."""
+    ############################### EMPTY UPDATES (middleware returns "None")
+    if not isinstance(data, dict):
+        return
+
+    ############################### DICT UPDATES (middleware updates state)
+    for source, update in data.items():
+        if not isinstance(update, dict):
+            continue
+
+        ###### UPDATE OF MESSAGES (only tail delta is relevant)
+        if msgs := update.get("messages"):
+            last: Union[AIMessage, HumanMessage, ToolMessage] = msgs[-1]
+            last_id = last.id or id(last)
+            if run.last_seen_msg_ids.get(source) != last_id:
+                run.last_seen_msg_ids[source] = last_id
+                handler = _message_handler(type(last))
+                if handler is not None:
+                    handler(last, run)
+
+        ####### CASE FINAL ANSWER / ABORT (final update made at end)
+        ## ABORT wins immediately
+        if update.get("agent_output_aborted"):
+            output_abortion_reason = update.get("agent_output_abortion_reason") or "aborted!"
+            chunk = _stream_event(run.event_templates, _EV_ABORTED, aborted=True, abortion_reason=output_abortion_reason)
+            run.emit(chunk)
+            run.result = f"[ABORTED: {output_abortion_reason}]"
+            return
+
+        if (validated_output := update.get("validated_agent_output")) is None:
+            continue
+
+        ## final answer
+        assert isinstance(validated_output, str) and validated_output
+        chunk = _stream_event(run.event_templates, _EV_FINAL, final_answer=validated_output)
+        run.emit(chunk)
+        run.result = run.final_answer = validated_output
+        return
+
+
+# stream modes consumed from the inner agent (message token chunks are not forwarded, hence not requested).
+# handlers are plain functions: they never suspend, so no coroutine object is created per event
+_STREAM_HANDLERS: Dict[str, Callable[[Any, _SubagentRun], None]] = {
+    "updates": _handle_updates,
+    "custom": _handle_custom,
+}
+
+
+class _QuerySchema(BaseModel):
+    """Args schema of subagent tools (built once, shared by all subagents)."""
+
+    user_query: str
+
+
+class _BatchQuerySchema(BaseModel):
+    """Args schema of batch subagent tools (built once, shared by all subagents)."""
+
+    user_queries: List[str]
+
 
 class AgentAsToolContainer:
     """..."""
 
-    def __init__(self, agents: List[RunnableAgent]) -> None:
+    def __init__(
+        self,
+        agents: List["RunnableAgent"],
+        batch_tools: bool = False,
+        batch_concurrency: int = 4,
+    ) -> None:
+        # batch variants are opt-in: each one adds a tool (schema and description) to the prompt of the outer agent
+        self.batch_tools = batch_tools
+        self.batch_concurrency = batch_concurrency
+        # per container (keys additionally contain subagent identity)
+        self.result_cache: SubagentResultCache = SubagentResultCache()
+        # one semaphore per event loop (subagents run on outer loop or background loop)
+        self._inflight_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
         self.subagents: Dict[str, StructuredTool] = {}
         self.subagents_raw: Dict[str, Callable[[str], Awaitable[str]]] = {}
+        self.subagents_batch_raw: Dict[str, Callable[[List[str]], Awaitable[str]]] = {}
+        # read-only initial states of agents (concurrent runs build their own state from it)
+        self._state_templates: Dict[str, Mapping[str, Any]] = {}
 
         for agent in agents:
             subagent_name = f"run_{agent.name}"
+            self._state_templates[subagent_name] = agent.initial_state
 
             # 1) build async core
             core: Callable[[str], Coroutine[Any, Any, str]] = self._build_subagent_as_tool(subagent=agent, subagent_name=subagent_name)
@@ -34,152 +225,158 @@ class AgentAsToolContainer:
             self.subagents_raw[subagent_name] = core
 
             # 4) sync wrap for StructuredTool
-            sync_wrapper: Callable[[str], str] = self._make_sync_wrapper(core)
+            sync_wrapper: Callable[..., str] = self._make_sync_wrapper(core)
 
-            # 5) create StructuredTool + store
+            # 5) create StructuredTool + store (async runs use coroutine, sync runs use wrapper)
             agent_as_tool = StructuredTool.from_function(
                 name=subagent_name,
                 description=agent.description,
                 func=sync_wrapper,
+                coroutine=core,
+                args_schema=_QuerySchema,
             )
             self.subagents[subagent_name] = agent_as_tool
 
+            # 6) batch variant (independent subqueries run concurrently), opt-in
+            if not batch_tools:
+                continue
+            batch_name = f"{subagent_name}_batch"
+            batch_core = self._build_batch_tool(core=core, batch_name=batch_name)
+            self.subagents_batch_raw[batch_name] = batch_core
+            agent_as_batch_tool = StructuredTool.from_function(
+                name=batch_name,
+                description=(
+                    f"{agent.description}\n"
+                    "BATCH VARIANT: Pass several independent subqueries at once as a list. "
+                    "They are answered concurrently; answers are returned per subquery."
+                ),
+                func=self._make_sync_wrapper(batch_core),
+                coroutine=batch_core,
+                args_schema=_BatchQuerySchema,
+            )
+            self.subagents[batch_name] = agent_as_batch_tool
+
     def _make_sync_wrapper(
             self, 
-            async_func: Callable[[str], Coroutine[Any, Any, str]]
-            ) -> Callable[[str], str]:
-        def wrapper(user_query: str) -> str:
-            return asyncio.run(async_func(user_query))
+            async_func: Callable[..., Coroutine[Any, Any, str]]
+            ) -> Callable[..., str]:
+        # keep signature of async core (StructuredTool derives args schema from it)
+        @functools.wraps(async_func)
+        def wrapper(*args: Any, **kwargs: Any) -> str:
+            return _LOOP_THREAD.run(async_func(*args, **kwargs))
         return wrapper
 
+    def _build_batch_tool(
+        self,
+        core: Callable[[str], Coroutine[Any, Any, str]],
+        batch_name: str,
+    ) -> Callable[[List[str]], Coroutine[Any, Any, str]]:
+        """Return batch variant of subagent, running subqueries concurrently (bounded by batch_concurrency)."""
+        async def run_subagent_batch(user_queries: List[str]) -> str:
+            """Runs the subagent once per subquery (concurrently) and returns all answers in one string."""
+            semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+            async def run_limited(user_query: str) -> str:
+                async with semaphore:
+                    return await core(user_query)
+
+            # wait for all subqueries (none keeps running detached); a failed subquery is reported at its position
+            answers = await asyncio.gather(*(run_limited(query) for query in user_queries), return_exceptions=True)
+            for query, answer in zip(user_queries, answers):
+                if isinstance(answer, BaseException):
+                    logger.error(f"[SUBAGENT {batch_name}] Subquery failed: {query!r}. Error: {answer!r}")
+            return "\n\n".join(
+                f"SUBQUERY: {query}\nERROR: Subquery failed ({type(answer).__name__}). LET USER KNOW!"
+                if isinstance(answer, BaseException)
+                else f"SUBQUERY: {query}\nANSWER: {answer}"
+                for query, answer in zip(user_queries, answers)
+            )
+
+        run_subagent_batch.__name__ = batch_name
+        run_subagent_batch.__qualname__ = batch_name
+        return run_subagent_batch
+
+    def _inflight_semaphore(self) -> asyncio.Semaphore:
+        """Return semaphore limiting concurrent subagent runs on the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._inflight_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(INNER_AGENT_CONCURRENCY)
+            self._inflight_semaphores[loop] = semaphore
+        return semaphore
+
     def _build_subagent_as_tool(
         self,
         subagent: Any,
         subagent_name: str,
     ) -> Callable[[str], Coroutine[Any, Any, str]]:
         """Return inner agent as callable async function."""
+        # all StreamChunk fields of this subagent per event type, copied per emitted event
+        event_templates = _event_templates(subagent_name)
+        # container holds the subagent, so its id stays unique for the lifetime of the cache
+        subagent_id = id(subagent)
+
         async def run_subagent(user_query: str) -> str:
             """
             Runs the inner agent with streaming and forwards inner progress into the
             OUTER agent stream via custom events.
             Returns final inner result as a normal tool return (string).
             """
-            writer = get_stream_writer()
-
-            emitted_toolcall_ids: Set[str] = set()
-            validated_output: Optional[str] = None
-
-            chunk = StreamChunk(
-                    level=StreamLevel.INNER.value,
-                    event = StreamEvent.START.value,
-                    agent_name= subagent_name,
-                    query=user_query
-                ).model_dump(mode="json")
-            writer(chunk)
-
-            extended_state = subagent.initial_state
-            extended_state["messages"] = [HumanMessage(user_query)]
-            extended_state["query"] = user_query
-
-            async for mode, data in subagent.agent.astream(
-                extended_state,
-                stream_mode=["updates", "messages", "custom"],
-            ):
-                ########################################### NESTED SUBAGENTS
-                if mode == "custom":
-                    logger.info(f"[SUBAGENT {subagent_name}] Receiving nested stream.")
-                    continue
-                
-                ########################################### MESSAGE CHUNKS
-                if mode == "messages":
-                    continue
-
-                ########################################### UPDATES IN NODES AND MIDDLEWARE
-                assert mode == "updates"
-                
-                ############################### EMPTY UPDATES (middleware returns "None") 
-                if not isinstance(data, dict):
-                    continue
-                
-                ############################### DICT UPDATES (middleware updates state) 
-                assert isinstance(data, dict)
-                for _source, update in data.items():
-                    if not isinstance(update, dict):
-                        continue
-
-                    ###### UPDATE OF MESSAGES
-                    msgs = update.get("messages")
-                    if msgs:
-                        last: Union[AIMessage, HumanMessage, ToolMessage] = msgs[-1]
-
-                        ####### CASE TOOLCALL REQUESTED
-                        if isinstance(last, AIMessage) and getattr(last, "tool_calls", None):
-                            for tc in last.tool_calls:
-                                tc_id = tc.get("id") or f"{tc.get('name')}::{hash(str(tc.get('args')))}"
-                                if tc_id in emitted_toolcall_ids:
-                                    continue
-                                emitted_toolcall_ids.add(tc_id)
-
-                                chunk = StreamChunk(
-                                        level=StreamLevel.INNER.value,
-                                        event=StreamEvent.TOOL_REQUEST.value,
-                                        agent_name= subagent_name,
-                                        toolcall_id=tc_id,
-                                        tool_name=tc.get("name", "unknown_tool")
-                                    ).model_dump(mode="json")
-                                writer(chunk)
-
-                        ####### CASE TOOLCALL RESULT
-                        elif isinstance(last, ToolMessage):
-                        
-                            chunk = StreamChunk(
-                                    level = StreamLevel.INNER.value,
-                                    event = StreamEvent.TOOL_RESULT.value,
-                                    agent_name= subagent_name,
-                                    tool_name=last.name,
-                                    data = last.content
-                                ).model_dump(mode="json")
-                            writer(chunk)
-
-                    ####### CASE FINAL ANSWER / ABORT (final update made at end)
-                    
-                    output_aborted = update.get("agent_output_aborted")
-                    validated_output = update.get("validated_agent_output")
-
-                    ## ABORT wins immediately
-                    if output_aborted:
-                        output_abortion_reason = update.get("agent_output_abortion_reason") or "aborted!"
-    
-                        chunk = StreamChunk(
-                                level = StreamLevel.INNER.value,
-                                event = StreamEvent.ABORTED.value,
-                                agent_name= subagent_name,
-                                aborted=True,
-                                abortion_reason=output_abortion_reason
-                            ).model_dump(mode="json")
-                        writer(chunk)
-
-                        return f"[ABORTED: {output_abortion_reason}]"
-                    
-                    if validated_output is None:
-                        continue
-                    
-                    ## final answer
-                    assert isinstance(validated_output, str) and validated_output
-                    
-                    chunk =  StreamChunk(
-                            level = StreamLevel.INNER.value,
-                            event =  StreamEvent.FINAL.value,
-                            agent_name= subagent_name,
-                            final_answer=validated_output
-                        ).model_dump(mode="json")
-                    writer(chunk)
-
-                    return validated_output
-
-            #### FALLBACK 
+            run = _SubagentRun(
+                subagent_name=subagent_name,
+                writer=get_stream_writer(),
+                event_templates=event_templates,
+            )
+
+            chunk = _stream_event(event_templates, _EV_START, query=user_query)
+            run.writer(chunk)
+
+            ########################################### CACHE LOOKUP (skips complete subagent run)
+            cache_key = self.result_cache.make_key(subagent_name, subagent_id, user_query)
+            cached_output = self.result_cache.get(cache_key)
+            if cached_output is not None:
+                logger.info(f"[SUBAGENT {subagent_name}] Cache hit, skipping subagent run.")
+                chunk = _stream_event(event_templates, _EV_FINAL, info="[CACHE] hit", final_answer=cached_output)
+                run.writer(chunk)
+                return cached_output
+
+            extended_state = {
+                **self._state_templates[subagent_name],
+                "messages": [HumanMessage(content=user_query)],
+                "query": user_query,
+            }
+
+            queued_at = time.monotonic()
+            async with self._inflight_semaphore():
+                waited = time.monotonic() - queued_at
+                if waited > INNER_AGENT_QUEUE_LOG_THRESHOLD:
+                    logger.warning(f"[SUBAGENT {subagent_name}] Waited {waited:.2f}s for free subagent slot.")
+
+                inner_stream = subagent.agent.astream(
+                    extended_state,
+                    stream_mode=list(_STREAM_HANDLERS),
+                )
+                try:
+                    async for mode, data in inner_stream:
+                        handler = _STREAM_HANDLERS.get(mode)
+                        if handler is None:
+                            continue
+                        handler(data, run)
+                        run.flush()
+                        if run.result is not None:
+                            break
+                finally:
+                    # release inner graph run (pending tasks, client sockets) right away instead of on gc
+                    await inner_stream.aclose()
+
+            #### FALLBACK
             # should not be reached, as loop either aborts or returns validated_output
-            return "SUBAGENT DID NOT CONVERGE! LET USER KNOW!"
+            if run.result is None:
+                return "SUBAGENT DID NOT CONVERGE! LET USER KNOW!"
+
+            if run.final_answer is not None:
+                self.result_cache.set(cache_key, run.final_answer)
+            return run.result
 
         # keep it readable in stack traces
         run_subagent.__name__ = subagent_name
@@ -0,0 +1,128 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Coroutine, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SubagentResultCache:
+    """LRU cache with time-to-live for final answers of subagents.
+
+    Entries are content-addressed by the subagent (name and identity of its graph) and the normalized user query.
+    Only converged (validated) answers are stored, aborted runs are never cached.
+    Thread-safe: subagents run on the outer event loop as well as on the background loop thread.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 7 * 86400) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(subagent_name: str, subagent_id: int, user_query: str) -> str:
+        """Build cache key from subagent name, subagent identity and normalized query (case and whitespace insensitive).
+
+        The identity separates different agents of the same name (e.g. differently configured agents named "Test").
+        """
+        normalized = " ".join(user_query.lower().split())
+        return hashlib.sha256(f"{subagent_name}|{subagent_id}|{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached answer, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, answer = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return answer
+
+    def set(self, key: str, answer: str) -> None:
+        """Store answer, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BackgroundEventLoop:
+    """Long-lived event loop in a daemon thread, serving as sync-to-async bridge for tools.
+
+    Replaces asyncio.run() per tool call: the loop (and with it http connection pools of async clients)
+    stays alive across calls. The thread is started lazily on first use. Coroutines run in a copy
+    of the caller's context, so langgraph context variables (e.g. the stream writer) stay available.
+    """
+
+    def __init__(self, name: str = "background-event-loop") -> None:
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Start loop thread on first use (thread-safe)."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def in_loop_thread(self) -> bool:
+        """True if called from the loop thread itself (blocking on the loop would deadlock)."""
+        return threading.current_thread() is self._thread
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run coroutine on background loop and block until its result is available."""
+        if self.in_loop_thread():
+            # nested sync call from inside the loop thread: blocking on own loop would deadlock
+            return self._run_in_fresh_thread(coro)
+        return self.submit(coro).result()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+        """Schedule coroutine on background loop without blocking; returns a thread-safe future.
+
+        Cancellation is passed both ways: cancelling the future cancels the task on the loop and vice versa.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started())
+
+    async def arun(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Await coroutine on background loop from another event loop; cancelling the caller cancels the coroutine."""
+        return await asyncio.wrap_future(self.submit(coro))
+
+    @staticmethod
+    def _run_in_fresh_thread(coro: Coroutine[Any, Any, T]) -> T:
+        """Fallback for nested calls: run coroutine with asyncio.run() in a short-lived helper thread."""
+        context = contextvars.copy_context()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(context.run, asyncio.run, coro).result()
+
+    def close(self) -> None:
+        """Stop the loop and join its thread (no-op if never started)."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if self._thread is not None:
+                self._thread.join()
+            self._loop.close()
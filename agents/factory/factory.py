@@ -1,6 +1,9 @@
-import json
+import functools
+import hashlib
 import logging
-from typing import Any, AsyncGenerator, Dict, List, Optional, Sequence, cast
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, AsyncGenerator, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, cast
 
 from dotenv import load_dotenv
 from langchain.agents import create_agent
@@ -16,7 +19,7 @@ from langchain_core.tools.structured import StructuredTool
 from langgraph.graph.state import CompiledStateGraph, StateT
 
 from agents.containers.mcp_tools import MCPToolContainer
-from agents.factory.utils import artificial_stream
+from agents.factory.utils import BoundedIdSet, artificial_ndjson_stream, embed_json_text, ndjson_data_record, ndjson_prefix, toolcall_key
 from agents.llm.client import model
 from agents.middleware.middleware import (
     AbortOnToolErrors,
@@ -41,6 +44,91 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 load_dotenv()
 
+# enum values used per chunk (plain str constants instead of enum attribute + .value per access)
+_EV_TOOL_REQUEST: str = StreamEvent.TOOL_REQUEST.value
+_EV_TOOL_RESULT: str = StreamEvent.TOOL_RESULT.value
+_EV_FINAL: str = StreamEvent.FINAL.value
+_EV_ABORTED: str = StreamEvent.ABORTED.value
+_LVL_OUTER: str = StreamLevel.OUTER.value
+# events after which outer stream of an update ends (tuple: chunk.event is a str enum member, matched by equality)
+_TERMINAL_EVENTS: Tuple[str, ...] = (_EV_ABORTED, _EV_FINAL)
+
+# pacing of outer final answer: records grow geometrically (1, 2, 4, ... words), overall speed stays at one word per pause
+FINAL_STREAM_PAUSE_PER_WORD: float = 0.04
+FINAL_STREAM_GROWTH: int = 2
+FINAL_STREAM_MAX_WORDS_PER_RECORD: int = 16
+
+# NDJSON record types sent to frontend
+NDJSON_TYPES: Tuple[str, ...] = ("tool_results", "text_final", "text_step")
+# serialized record heads per (level, type), computed once; per record only data is serialized
+_NDJSON_PREFIXES: Dict[Tuple[str, str], bytes] = {
+    (level.value, record_type): ndjson_prefix(level.value, record_type)
+    for level in StreamLevel
+    for record_type in NDJSON_TYPES
+}
+
+
+# state keys of outer-agent updates that produce stream chunks
+_STREAMED_UPDATE_KEYS: frozenset[str] = frozenset({"messages", "validated_agent_output", "agent_output_aborted"})
+
+################################################################### chunk encoders (one per event)
+def _encode_tool_result(chunk: StreamChunk) -> Optional[bytes]:
+    return _ndjson(chunk.level, "tool_results", embed_json_text(chunk.data))
+
+
+def _encode_final(chunk: StreamChunk) -> Optional[bytes]:
+    text = chunk.final_answer or ""
+    if not text:
+        return None
+    return _ndjson(chunk.level, "text_final", text)
+
+
+def _encode_start(chunk: StreamChunk) -> Optional[bytes]:
+    marker = f"[{chunk.level}] START: {chunk.agent_name}...."
+    return _ndjson(chunk.level, "text_step", marker)
+
+
+def _encode_tool_request(chunk: StreamChunk) -> Optional[bytes]:
+    tool = chunk.tool_name or "unknown_tool"
+    tcid = f" (id={chunk.toolcall_id})" if chunk.toolcall_id else ""
+    marker = f"[{chunk.level}] CALLING TOOL: {chunk.agent_name}::{tool}{tcid}...."
+    return _ndjson(chunk.level, "text_step", marker)
+
+
+def _encode_aborted(chunk: StreamChunk) -> Optional[bytes]:
+    reason = chunk.abortion_reason or "aborted!"
+    marker = f"[{chunk.level}] ABORTED: {chunk.agent_name}: {reason}"
+    return _ndjson(chunk.level, "text_step", marker)
+
+
+# keyed by enum members (chunk.event is a StreamEvent; its hash is not the hash of its str value)
+_CHUNK_ENCODERS: Dict[StreamEvent, Callable[[StreamChunk], Optional[bytes]]] = {
+    StreamEvent.TOOL_RESULT: _encode_tool_result,
+    StreamEvent.FINAL: _encode_final,
+    StreamEvent.START: _encode_start,
+    StreamEvent.TOOL_REQUEST: _encode_tool_request,
+    StreamEvent.ABORTED: _encode_aborted,
+}
+
+def _output_text(validated: Any) -> str:
+    """Text of validated agent output that is not a plain string (AIMessage or other object)."""
+    if isinstance(validated, AIMessage):
+        content = validated.content
+        return content if isinstance(content, str) else str(content)
+    return str(validated)
+
+
+# langchain message class per frontend chat role
+_ROLE_TO_MESSAGE: Dict[ChatRole, type[HumanMessage] | type[AIMessage]] = {
+    ChatRole.user: HumanMessage,
+    ChatRole.ai: AIMessage,
+}
+
+
+def _ndjson(level: StreamLevel, record_type: str, data: Any) -> bytes:
+    """Build NDJSON record from precomputed prefix (all level/type combinations are precomputed)."""
+    return ndjson_data_record(_NDJSON_PREFIXES[(level.value, record_type)], data)
+
 
 class RunnableAgent:
     """Provides a high-level wrapper around a fully configured agent.
@@ -70,9 +158,8 @@ class RunnableAgent:
         self.behaviour_config: AgentBehaviourConfig = behaviour_config
         self.name: str = name or ""
         self.description = description
-        self.initial_state = CustomStateShared(
-            messages=[HumanMessage("EMPTY_PLACEHOLDER")],
-            query="EMPTY_PLACEHOLDER",
+        # read-only template without messages/query; per call a fresh state is built from it (see _build_state)
+        self.initial_state: Mapping[str, Any] = MappingProxyType(CustomStateShared(  # type: ignore[typeddict-item]
             agent_name=self.name,
             toolcall_error=False,
             error_toolname=None,
@@ -84,13 +171,11 @@ class RunnableAgent:
             agent_output_abortion_reason=None,
             agent_output_description=None,
             validated_agent_output=None,
-        )
+        ))
 
     async def run(self, messages: List[ChatMessage]) -> str | dict[str, Any]:
         """Executes the configured agent using a message."""
-        extended_state = self.initial_state
-        extended_state["messages"] = self._construct_thread(messages)  # type: ignore[typeddict-item]
-        extended_state["query"] = messages[-1].content
+        extended_state = self._build_state(messages)
 
         result = await self.agent.ainvoke(extended_state)
 
@@ -101,88 +186,90 @@ class RunnableAgent:
             messages: List[ChatMessage]
             ) -> AsyncGenerator[bytes, None]:
         """Executes the configured agent using a message."""
-        extended_state = self.initial_state
-        extended_state["messages"] = self._construct_thread(messages)  # type: ignore[typeddict-item]
-        extended_state["query"] = messages[-1].content
+        extended_state = self._build_state(messages)
 
-        emitted_toolcall_ids: set[str] = set()
+        emitted_toolcall_ids = BoundedIdSet()
 
         async for stream_mode, data in self.agent.astream(
             extended_state,
-            stream_mode=["messages", "updates", "custom"],
+            # message token chunks are not forwarded to the frontend, hence not requested
+            stream_mode=["updates", "custom"],
         ):
             ########################################### CUSTOM EVENTS FROM SUBAGENTS (SUBTHREAD)
             if stream_mode == "custom":
-        
-                async for part in self._handle_subagent_stream(data):
-                    yield part
+                for record in self._handle_subagent_stream(data):
+                    yield record
                 continue
             
-            ########################################### OUTER AGENT MESSAGE CHUNKS (SUPPRESS)
-            if stream_mode == "messages":
-                continue
-
             ########################################### OUTER AGENT MESSAGE UPDATES (HIGHEST THREAD)
             assert stream_mode == "updates"
             assert isinstance(data, dict)
-            async for b in self._handle_agent_stream(
+            async for b in self._emit_update(
                     data,
                     emitted_toolcall_ids,
                 ):
                     yield b
 
+    def _build_state(self, messages: List[ChatMessage]) -> Dict[str, Any]:
+        """Build fresh graph input state per call (initial_state is shared and never mutated)."""
+        return {
+            **self.initial_state,
+            "messages": self._construct_thread(messages),
+            "query": messages[-1].content,
+        }
+
     def _construct_thread(
             self, 
             messages: List[ChatMessage]
             ) -> List[AIMessage | SystemMessage | HumanMessage]:
         """Construct langchain message list from frontend input."""
-        thread: list[SystemMessage | HumanMessage | AIMessage] = [
-            SystemMessage(self.behaviour_config.system_prompt)
-        ]
+        # fresh message per run: the messages reducer assigns ids in place
+        thread: list[SystemMessage | HumanMessage | AIMessage] = [SystemMessage(self.behaviour_config.system_prompt)]
         for message in messages:
-            match message.role:
-                case ChatRole.user:
-                    thread.append(HumanMessage(message.content))
-                case ChatRole.ai:
-                    thread.append(AIMessage(message.content))
-                case _:
-                    raise ValueError(f"Unsupported role: {message.role}")
+            message_class = _ROLE_TO_MESSAGE.get(message.role)
+            if message_class is None:
+                raise ValueError(f"Unsupported role: {message.role}")
+            # content is a validated str (frontend model) -> skip message validation
+            thread.append(message_class.model_construct(content=message.content))
         return thread
 
-    async def _handle_subagent_stream(
+    def _handle_subagent_stream(
         self,
         data,
-    ) -> AsyncGenerator[bytes, None]:
+    ) -> List[bytes]:
         """
         Handle 'custom' stream_mode events (inner/subagent stream forwarded to outer).
-        Emits using the central chunk emitter.
+        Subagents write single events or (coalesced) lists of events; order is preserved.
+        Returns NDJSON records built by the central chunk serializer (no pacing for inner chunks).
         """
-        chunk: Optional[StreamChunk] = None
-        try:
-            chunk = StreamChunk.model_validate(data)
-        except Exception:
-            chunk = StreamChunk(
-                level=StreamLevel.OUTER.value,  # type: ignore[arg-type]
-                event=StreamEvent.ABORTED.value,  # type: ignore[arg-type]
-                agent_name=self.name,
-                info="[STREAM] Received custom chunk with invalid model!",
-                aborted=True,
-                abortion_reason="invalid custom chunk model",
-                data=data,
-            )
+        records: List[bytes] = []
+        items = data if isinstance(data, list) else (data,)
+        for item in items:
+            # subagents emit plain dicts (built from their event templates)
+            try:
+                chunk = StreamChunk.model_validate(item)
+            except Exception:
+                chunk = StreamChunk(
+                    level=_LVL_OUTER,  # type: ignore[arg-type]
+                    event=_EV_ABORTED,  # type: ignore[arg-type]
+                    agent_name=self.name,
+                    info="[STREAM] Received custom chunk with invalid model!",
+                    aborted=True,
+                    abortion_reason="invalid custom chunk model",
+                    data=item,
+                )
 
-        if chunk is None:
-            yield self._emit_chunk_ndjson(chunk)
-            return
-        
-        async for b in self._emit_chunk_ndjson(chunk):
-            yield b
+            record = self._chunk_record(chunk)
+            if record is not None:
+                records.append(record)
+        return records
 
-    async def _handle_agent_stream(
+    async def _emit_update(
         self,
         data: Dict,
         emitted_toolcall_ids,
-    ):
+    ) -> AsyncGenerator[bytes, None]:
+        """Emit NDJSON records of one outer-agent update (single generator; only the final answer is paced)."""
         for _source, update in data.items():  # type: ignore[union-attr]
             if not isinstance(update, dict):
                 continue
@@ -194,17 +281,20 @@ class RunnableAgent:
 
             for chunk in chunks:
 
-                async for b in self._emit_chunk_ndjson(chunk):
-                    yield b
+                if chunk.event == _EV_FINAL and chunk.level == _LVL_OUTER:
+                    async for b in self._stream_final_answer(chunk.final_answer or ""):
+                        yield b
+                elif (record := self._chunk_record(chunk)) is not None:
+                    yield record
 
                 # IMPORTANT: keep current control flow
-                if chunk.event in (StreamEvent.ABORTED.value, StreamEvent.FINAL.value):
+                if chunk.event in _TERMINAL_EVENTS:
                     return
             
     def _extract_agent_chunks(
             self,
             update: dict[str, Any],
-            emitted_toolcall_ids:set[str],
+            emitted_toolcall_ids: BoundedIdSet,
     ) -> List[StreamChunk]:
         """
         Translate a single outer-agent update dict into 0..n StreamChunk objects.
@@ -212,13 +302,17 @@ class RunnableAgent:
         """
         chunks: List[StreamChunk] = []
 
+        ########### FAST PATH: update carries nothing to stream (e.g. counter/flag updates of middleware)
+        if update.keys().isdisjoint(_STREAMED_UPDATE_KEYS):
+            return chunks
+
          ########### CASE VALIDATOR ABORT
         if update.get("agent_output_aborted") is True:
             reason = update.get("agent_output_abortion_reason") or "validation rejected"
             chunks.append(
                 StreamChunk(
-                    level=StreamLevel.OUTER.value,  # type: ignore[arg-type]
-                    event=StreamEvent.ABORTED.value,  # type: ignore[arg-type]
+                    level=_LVL_OUTER,  # type: ignore[arg-type]
+                    event=_EV_ABORTED,  # type: ignore[arg-type]
                     agent_name=self.name,
                     aborted=True,
                     abortion_reason=reason,
@@ -232,20 +326,21 @@ class RunnableAgent:
             last: AnyMessage = msgs[-1]
 
             ##### TOOL_REQUEST (possibly multiple)
-            if isinstance(last, AIMessage) and getattr(last, "tool_calls", None):
+            if isinstance(last, AIMessage) and last.tool_calls:
+                already_emitted = emitted_toolcall_ids.__contains__
                 for tc in last.tool_calls:
-                    tc_id = tc.get("id") or f"{tc.get('name')}::{hash(str(tc.get('args')))}"
-                    if tc_id in emitted_toolcall_ids:
+                    tc_id = toolcall_key(tc)
+                    if already_emitted(tc_id):
                         continue
                     emitted_toolcall_ids.add(tc_id)
 
                     chunks.append(
                         StreamChunk(
-                            level=StreamLevel.OUTER.value,  # type: ignore[arg-type]
-                            event=StreamEvent.TOOL_REQUEST.value,  # type: ignore[arg-type]
+                            level=_LVL_OUTER,  # type: ignore[arg-type]
+                            event=_EV_TOOL_REQUEST,  # type: ignore[arg-type]
                             agent_name=self.name,
                             toolcall_id=tc_id,
-                            tool_name=tc.get("name", "unknown_tool"),
+                            tool_name=tc.get("name") or "unknown_tool",
                             data=tc.get("args"),  # optional; keep for later
                         )
                     )
@@ -254,8 +349,8 @@ class RunnableAgent:
             elif isinstance(last, ToolMessage):
                 chunks.append(
                     StreamChunk(
-                        level=StreamLevel.OUTER.value,  # type: ignore[arg-type]
-                        event=StreamEvent.TOOL_RESULT.value,  # type: ignore[arg-type]
+                        level=_LVL_OUTER,  # type: ignore[arg-type]
+                        event=_EV_TOOL_RESULT,  # type: ignore[arg-type]
                         agent_name=self.name,
                         tool_name=last.name,
                         data=last.content,
@@ -264,66 +359,113 @@ class RunnableAgent:
 
         ########### CASE FINAL ANSWER
         validated = update.get("validated_agent_output")
-        if validated is not None:
-            if isinstance(validated, AIMessage):
-                text = validated.content if isinstance(validated.content, str) else str(validated.content)
-            else:
-                text = str(validated)
+        if validated is None:
+            return chunks
 
-            if text:
-                chunks.append(
-                    StreamChunk(
-                        level=StreamLevel.OUTER.value,  # type: ignore[arg-type]
-                        event=StreamEvent.FINAL.value,  # type: ignore[arg-type]
-                        agent_name=self.name,
-                        final_answer=text,
-                    )
+        # validator stores plain strings -> exact type check first, conversion only for other outputs
+        text = validated if type(validated) is str else _output_text(validated)
+        if text:
+            chunks.append(
+                StreamChunk(
+                    level=_LVL_OUTER,  # type: ignore[arg-type]
+                    event=_EV_FINAL,  # type: ignore[arg-type]
+                    agent_name=self.name,
+                    final_answer=text,
                 )
+            )
 
         return chunks
 
-    async def _emit_chunk_ndjson(self, chunk: StreamChunk) -> AsyncGenerator[bytes, None]:
-        """Emit one StreamChunk as NDJSON records."""
-    
-        if chunk.event == StreamEvent.TOOL_RESULT.value:
-            if chunk.level == StreamLevel.OUTER.value:
-                yield (json.dumps({"level": chunk.level, "type":"tool_results", "data": chunk.data}, ensure_ascii=False) + "\n").encode("utf-8")
-                return
-            if chunk.level == StreamLevel.INNER.value:
-                yield (json.dumps({"level": chunk.level, "type":"tool_results", "data": chunk.data}, ensure_ascii=False) + "\n").encode("utf-8")
-                return
-
-        if chunk.event == StreamEvent.FINAL.value:
-            text = chunk.final_answer or ""
-            if not text:
-                return
-            
-            if chunk.level == StreamLevel.OUTER.value:
-                async for part in artificial_stream(text, pause=0.04):
-                    yield (json.dumps({"level": chunk.level, "type":"text_final", "data": part}, ensure_ascii=False) + "\n").encode("utf-8")
-                return
-            
-            if chunk.level == StreamLevel.INNER.value:
-                yield (json.dumps({"level": chunk.level, "type":"text_final", "data": text}, ensure_ascii=False) + "\n").encode("utf-8")
-                return
+    async def _stream_final_answer(self, text: str) -> AsyncGenerator[bytes, None]:
+        """Stream outer final answer paced as NDJSON records (only async emission path)."""
+        # constant envelope resolved once, answer serialized once; records are byte slices of it
+        prefix = _NDJSON_PREFIXES[(_LVL_OUTER, "text_final")]
+        async for record in artificial_ndjson_stream(
+            prefix,
+            text,
+            pause=FINAL_STREAM_PAUSE_PER_WORD,
+            words_per_chunk=1,
+            growth=FINAL_STREAM_GROWTH,
+            max_words_per_chunk=FINAL_STREAM_MAX_WORDS_PER_RECORD,
+        ):
+            yield record
 
-        marker: str
-        if chunk.event == StreamEvent.START.value:
-            marker = f"[{chunk.level}] START: {chunk.agent_name}...."
+    def _chunk_record(self, chunk: StreamChunk) -> Optional[bytes]:
+        """Serialize one StreamChunk as NDJSON record (None for empty final answers).
 
-        elif chunk.event == StreamEvent.TOOL_REQUEST.value:
-            tool = chunk.tool_name or "unknown_tool"
-            tcid = f" (id={chunk.toolcall_id})" if chunk.toolcall_id else ""
-            marker = f"[{chunk.level}] CALLING TOOL: {chunk.agent_name}::{tool}{tcid}...."
+        Final answers are emitted as one record here; pacing of the outer final answer happens in _emit_update.
+        """
+        encoder = _CHUNK_ENCODERS.get(chunk.event)
+        if encoder is None:
+            raise ValueError("[STREAM] Uncovered event!")
+        return encoder(chunk)
 
-        elif chunk.event == StreamEvent.ABORTED.value:
-            reason = chunk.abortion_reason or "aborted!"
-            marker = f"[{chunk.level}] ABORTED: {chunk.agent_name}: {reason}"
+# stateless middleware (hooks only read state and return updates) -> instantiated once, shared by all agents
+_BASIC_MIDDLEWARE: Tuple[AgentMiddleware, ...] = (
+    LoggingMiddlewareSync(),
+    ModelCallCounterMiddlewareSync(),
+    AbortOnToolErrors(),
+)
+_ONLY_ONE_MODEL_CALL_MIDDLEWARE: AgentMiddleware = OnlyOneModelCallMiddlewareSync()
+
+
+@functools.lru_cache(maxsize=128)
+def _build_middleware(
+    only_one_model_call: bool,
+    max_toolcalls: Optional[int],
+    system_prompt: str,
+    toolbased_answer_prompt: Optional[str],
+    direct_answer_prompt: Optional[str],
+    directanswer_validation_sysprompt: Optional[str],
+) -> Tuple[Any, ...]:
+    """Assemble complete middleware for given behaviour knobs. Pure function of its args -> memoized, shared by graphs."""
+    #################### basic middleware (stateless, shared)
+    basic_middleware: list[Any] = list(_BASIC_MIDDLEWARE)
+
+    #################### loop control middleware
+    loopcontrol_middleware: list[Any] = []
+
+    if only_one_model_call:
+        loopcontrol_middleware.append(_ONLY_ONE_MODEL_CALL_MIDDLEWARE)
+
+    if max_toolcalls is not None:
+        if max_toolcalls < 0:
+            raise ValueError("max_toolcalls must be >= 0 or None")
+        loopcontrol_middleware.append(
+            global_toolcall_limit_sync(max_toolcalls)
+        )
 
-        else:
-            raise ValueError("[STREAM] Uncovered event!")
+    if (
+        toolbased_answer_prompt is not None
+        or direct_answer_prompt is not None
+    ):
+        effective_toolbased_prompt = (
+            toolbased_answer_prompt
+            if toolbased_answer_prompt is not None
+            else system_prompt
+        )
+
+        loopcontrol_middleware.extend(
+            override_final_agentprompt_async(
+                toolbased_answer_prompt=effective_toolbased_prompt,
+                direct_answer_prompt=direct_answer_prompt,
+            )
+        )
+
+    #################### validation middleware
+    validation_middleware: list[Any] = [
+        configured_validator_async(
+            directanswer_validation_prompt=directanswer_validation_sysprompt or None,
+        )
+    ]
+
+    #################### complete middleware
+    return tuple(
+        basic_middleware
+        + loopcontrol_middleware
+        + validation_middleware
+    )
 
-        yield (json.dumps({"level": chunk.level, "type":"text_step", "data": marker}, ensure_ascii=False) + "\n").encode("utf-8")
 
 class AgentFactory:
     """Provides a unified mechanism for constructing fully configured agents.
@@ -345,8 +487,28 @@ class AgentFactory:
 
     def __init__(
         self,
+        graph_cache_size: int = 64,
     ):
         self.llm = model
+        # compiled graphs per graph-relevant config content (LRU); agents wrap them in fresh RunnableAgents
+        self.graph_cache_size = graph_cache_size
+        self._graph_cache: OrderedDict[str, CompiledStateGraph] = OrderedDict()
+
+    def clear_cache(self) -> None:
+        """Drop this factory's cached compiled graphs; agents charged afterwards compile their graph anew.
+
+        Only the graph cache of this factory is cleared: middleware instances (_build_middleware) and
+        already built RunnableAgents (e.g. the agent cache in agents.api.utils) are kept.
+        """
+        self._graph_cache.clear()
+
+    @staticmethod
+    def _graph_key(complete_config: CompleteAgentConfig) -> str:
+        """Content hash of everything the compiled graph depends on (behaviour, tool schemas, subagent tools by identity)."""
+        behaviour = complete_config.behaviour_config.model_dump_json(exclude={"name", "description"})
+        schemas = ",".join(schema.model_dump_json() for schema in complete_config.tool_schemas)
+        subagent_ids = ",".join(str(id(subagent)) for subagent in complete_config.subagents)
+        return hashlib.blake2b(f"{behaviour}|{schemas}|{subagent_ids}".encode("utf-8"), digest_size=16).hexdigest()
 
     def _charge_runnable_agent(
         self, name: str, complete_config: CompleteAgentConfig
@@ -372,6 +534,19 @@ class AgentFactory:
         """
         behaviour_conf: AgentBehaviourConfig = complete_config.behaviour_config
 
+        ################################################################### reuse compiled graph (skip tools + compilation)
+        graph_key = self._graph_key(complete_config)
+        cached_graph = self._graph_cache.get(graph_key)
+        if cached_graph is not None:
+            self._graph_cache.move_to_end(graph_key)
+            logger.debug(f"[AGENT CREATION] Reusing compiled graph for agent {name}")
+            return RunnableAgent(
+                langchain_agent=cached_graph,
+                behaviour_config=behaviour_conf,
+                description=complete_config.description,
+                name=name,
+            )
+
         ################################################################### charge tools (inject)
         tools: List[StructuredTool] = self._charge_tools(
             tool_schemas=complete_config.tool_schemas,
@@ -386,6 +561,10 @@ class AgentFactory:
             name=name,
         )
 
+        self._graph_cache[graph_key] = agent.agent
+        if len(self._graph_cache) > self.graph_cache_size:
+            self._graph_cache.popitem(last=False)
+
         logger.debug(f"[AGENT CREATION] Successfully created agent {name}")
         return agent
 
@@ -395,8 +574,8 @@ class AgentFactory:
         """Creates tools with container class methodology. Injects mandatory and optional data."""
         ############################################################## build tool container
         tool_container = MCPToolContainer(schemas=tool_schemas)
-        mcp_tools: List[StructuredTool] = list(tool_container.tools_agent.values())
-        all_tools = mcp_tools + subagents
+        # single list built from both sources (no intermediate list of mcp tools)
+        all_tools: List[StructuredTool] = [*tool_container.tools_agent.values(), *subagents]
         return all_tools
 
     def _create_runnable_agent(
@@ -408,58 +587,18 @@ class AgentFactory:
     ) -> RunnableAgent:
         """Builds a ConfiguredAgent from a flat serializable config + factory-wired middleware."""
 
-        ################################################# assemble middleware
-        
-        #################### basic middleware
-        basic_middleware: list[Any] = [
-            LoggingMiddlewareSync(),
-            ModelCallCounterMiddlewareSync(),
-            AbortOnToolErrors()
-        ]
-
-        #################### loop control middleware
-        loopcontrol_middleware: list[Any] = []
-
-        if behaviour_config.only_one_model_call:
-            loopcontrol_middleware.append(OnlyOneModelCallMiddlewareSync())
-
-        if behaviour_config.max_toolcalls is not None:
-            if behaviour_config.max_toolcalls < 0:
-                raise ValueError("max_toolcalls must be >= 0 or None")
-            loopcontrol_middleware.append(
-                global_toolcall_limit_sync(behaviour_config.max_toolcalls)
+        ################################################# assemble middleware (memoized per distinct behaviour knobs)
+        complete_middleware = list(
+            _build_middleware(
+                only_one_model_call=behaviour_config.only_one_model_call,
+                max_toolcalls=behaviour_config.max_toolcalls,
+                system_prompt=behaviour_config.system_prompt,
+                toolbased_answer_prompt=behaviour_config.toolbased_answer_prompt,
+                direct_answer_prompt=behaviour_config.direct_answer_prompt,
+                directanswer_validation_sysprompt=behaviour_config.directanswer_validation_sysprompt,
             )
-
-        if (
-            behaviour_config.toolbased_answer_prompt is not None
-            or behaviour_config.direct_answer_prompt is not None
-        ):
-            effective_toolbased_prompt = (
-                behaviour_config.toolbased_answer_prompt
-                if behaviour_config.toolbased_answer_prompt is not None
-                else behaviour_config.system_prompt
-            )
-
-            loopcontrol_middleware.extend(
-                override_final_agentprompt_async(
-                    toolbased_answer_prompt=effective_toolbased_prompt,
-                    direct_answer_prompt=behaviour_config.direct_answer_prompt,
-                )
-            )
-
-        #################### validation middleware
-        validation_middleware: list[Any] = [
-            configured_validator_async(
-                directanswer_validation_prompt=behaviour_config.directanswer_validation_sysprompt or None,
-            )
-        ]
-
-        #################### complete middleware
-        complete_middleware = (
-            basic_middleware
-            + loopcontrol_middleware
-            + validation_middleware
         )
+
         ################################################# build langchain agent (core asset)
         agent: CompiledStateGraph = create_agent(
             model=self.llm,
@@ -1,9 +1,136 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Iterator, Mapping, Optional, Tuple
 import asyncio
+import hashlib
+import json
+import math
+from collections import OrderedDict
 
-async def artificial_stream(answer: str, pause:float) -> AsyncGenerator[str, None]:
+from pydantic_core import from_json, to_json
+
+# constant tail of records built from a prefix (closes record object, ends line)
+_RECORD_END: bytes = b"}\n"
+
+# shortest sleep of artificial_ndjson_stream: smaller pauses are batched (more words per chunk) instead of waking the loop per word
+MIN_STREAM_SLEEP: float = 0.01
+
+
+def ndjson_prefix(level: str, record_type: str) -> bytes:
+    """Serialize constant head of NDJSON record (level and type), open for the data value.
+
+    Together with ndjson_data_record, produces the same bytes as to_json({"level": ..., "type": ..., "data": ...}) + b"\n"
+    (one NDJSON line, utf-8, non-ascii unescaped).
+    """
+    return to_json({"level": level, "type": record_type})[:-1] + b',"data":'
+
+
+def ndjson_data_record(prefix: bytes, data: Any) -> bytes:
+    """Complete NDJSON record from precomputed prefix, serializing only the data value."""
+    # one join instead of two concatenations (no intermediate bytes object)
+    return b"".join((prefix, to_json(data), _RECORD_END))
+
+
+def embed_json_text(data: Any) -> Any:
+    """Return JSON text (object or array, e.g. MCP tool results) as parsed value, anything else unchanged.
+
+    Serialized as nested JSON instead of an escaped string: no double escaping on the wire, no second parse in the client.
+    """
+    if isinstance(data, str) and data[:1] in ("{", "["):
+        try:
+            return from_json(data)
+        except ValueError:
+            return data
+    return data
+
+
+def toolcall_key(toolcall: Mapping[str, Any]) -> str:
+    """Return id of toolcall, or (if missing) a stable content key from its name and args.
+
+    The content key is stable across processes (unlike hash()) and independent of args key order.
+    """
+    toolcall_id = toolcall.get("id")
+    if toolcall_id:
+        return toolcall_id
+    args = toolcall.get("args")
+    if not args:
+        # no args -> name alone identifies toolcall, no serialization needed
+        return f"{toolcall.get('name')}::"
+    args = json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.blake2b(args.encode("utf-8"), digest_size=8).hexdigest()
+    return f"{toolcall.get('name')}::{digest}"
+
+
+class BoundedIdSet:
+    """Set of already emitted ids with fixed capacity (oldest ids are dropped first).
+
+    Dedupe is only needed within a run; the cap bounds memory of long-running streams.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._ids: OrderedDict[str, None] = OrderedDict()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, key: str) -> None:
+        self._ids[key] = None
+        if len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+
+def _chunk_bounds(
+    n_words: int,
+    pause: float,
+    words_per_chunk: int,
+    growth: int,
+    max_words_per_chunk: Optional[int],
+) -> Iterator[Tuple[int, int]]:
+    """Word ranges [start, end) of the chunks of an artificial stream (see artificial_ndjson_stream)."""
+    if pause <= 0:
+        if n_words:
+            yield 0, n_words
+        return
+
+    # each chunk holds at least as many words as fill one minimal sleep
+    min_size = max(1, math.ceil(MIN_STREAM_SLEEP / pause))
+    size = max(words_per_chunk, min_size)
+    start = 0
+    while start < n_words:
+        end = min(start + size, n_words)
+        yield start, end
+        start = end
+        size *= growth
+        if max_words_per_chunk is not None:
+            size = max(min(size, max_words_per_chunk), min_size)
+
+
+async def artificial_ndjson_stream(
+    prefix: bytes,
+    answer: str,
+    pause: float,
+    words_per_chunk: int = 1,
+    growth: int = 1,
+    max_words_per_chunk: Optional[int] = None,
+) -> AsyncGenerator[bytes, None]:
+    """Stream answer in chunks of words as finished NDJSON records (prefix from ndjson_prefix), pausing pause seconds per word of each chunk.
+
+    Chunks start with words_per_chunk words and grow by factor growth (capped at max_words_per_chunk):
+    first words show up immediately, later (longer) parts need fewer yields and loop wakeups.
+    Without pause, the answer is yielded at once; very small pauses are batched to sleeps of at least MIN_STREAM_SLEEP.
+    The answer is serialized once; records are built from byte slices of it, no serialization per chunk.
+    Works since JSON escaping is per character and never produces or removes spaces: after joining the words
+    with single spaces, the spaces of the serialized answer are exactly the word boundaries.
+    """
     words = answer.split()
-    for i, w in enumerate(words):
-        chunk = w if i == len(words) - 1 else f"{w} "
-        yield chunk
-        await asyncio.sleep(pause)
\ No newline at end of file
+    n_words = len(words)
+    if not n_words:
+        return
+    encoded_words = to_json(" ".join(words))[1:-1].split(b" ")
+    for start, end in _chunk_bounds(n_words, pause, words_per_chunk, growth, max_words_per_chunk):
+        closing = b'"' if end >= n_words else b' "'
+        yield b"".join((prefix, b'"', b" ".join(encoded_words[start:end]), closing, _RECORD_END))
+        if pause > 0:
+            await asyncio.sleep(pause * (end - start))
@@ -30,6 +30,11 @@ class BaseMCPClient(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def call_tools(self, tooling_decision: List[MCPToolDecision]) -> List[CallToolResult]:
+    async def call_tools(
+        self,
+        tooling_decision: List[MCPToolDecision],
+        keep_open: bool = False,
+        return_exceptions: bool = False,
+    ) -> List[CallToolResult]:
         """Method to call tools on mcp server."""
         raise NotImplementedError
@@ -146,6 +146,14 @@ class MCPClient(BaseMCPClient):
                 code=MCPErrorCode.UNKNOWN,
             ) from error
 
+    def _require_session(self) -> None:
+        """Raise, if there is no open session (for calls on a connection owned by the caller)."""
+        if self.session is None:
+            raise MCPError(
+                "[CLIENT] No open session to mcp server.",
+                code=MCPErrorCode.CLIENT,
+            )
+
     ################################################################ tooling methods
 
     async def get_tools(self) -> List[OpenAITool]:
@@ -225,48 +233,68 @@ class MCPClient(BaseMCPClient):
         logger.debug("[CLIENT] Tools successfully retrieved and converted.")
         return openai_tools
 
-    async def call_tools(self, tooling_decision: List[MCPToolDecision]) -> List[CallToolResult]:
-        """Call all tools decided in the last tooling decision step."""
-        try:
-            if self.session is None:
-                await self.connect()
-            else:
-                await self._check_for_reconnect()
-
-            toolcall_results: List[CallToolResult] = []
-
-            for tool_call in tooling_decision:
-                tool_call_dumped = tool_call.model_dump()
-                tool_name, tool_args, tool_call_id = (
-                    tool_call_dumped["name"],
-                    tool_call_dumped["args"],
-                    tool_call_dumped["id"],
-                )
-                assert self.session is not None
-                tool_response: CallToolResult = await self.session.call_tool(tool_name, tool_args)
-                logger.info(f"[CLIENT] Called tool {tool_name}. Error: {tool_response.isError}")
-
-                ##### first check types. Currently, content allows text only
-                assert isinstance(tool_response.content[0], TextContent)
-                assert tool_response.content[0].type == "text"
-                assert tool_response.content[0].text
-                assert tool_response.structuredContent is None or isinstance(
-                    tool_response.structuredContent, dict
-                )
+    async def call_tools(
+        self,
+        tooling_decision: List[MCPToolDecision],
+        keep_open: bool = False,
+        return_exceptions: bool = False,
+    ) -> List[CallToolResult]:
+        """Call all tools decided in the last tooling decision step.
+
+        Tools of one decision are independent and called concurrently over the session (results in decision order).
+        With keep_open=True the open session of the caller is used as is and stays open afterwards: no ping/reconnect,
+        since the owner of the connection (see MCPConnection) checks and reopens it in its own task.
+        With return_exceptions=True, failed toolcalls are returned as MCPError at their position instead of raising.
+        """
+        if keep_open:
+            self._require_session()
+        elif self.session is None:
+            await self.connect()
+        else:
+            await self._check_for_reconnect()
 
-                ##### append
-                toolcall_results.append(tool_response)
+        outcomes = await asyncio.gather(
+            *(self._call_tool(tool_call) for tool_call in tooling_decision),
+            return_exceptions=True,
+        )
 
-            # log success, return
-            logger.info("[CLIENT] Successfully called tools on mcp server")
+        if not keep_open:
             await self.close()
 
-            return toolcall_results
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and (
+                not return_exceptions or not isinstance(outcome, MCPError)
+            ):
+                raise outcome
+
+        # log success, return
+        logger.info("[CLIENT] Successfully called tools on mcp server")
+        return cast(List[CallToolResult], outcomes)
+
+    async def _call_tool(self, tool_call: MCPToolDecision) -> CallToolResult:
+        """Call one tool over the open session. Errors are raised as MCPError."""
+        tool_call_dumped = tool_call.model_dump()
+        tool_name, tool_args, tool_call_id = (
+            tool_call_dumped["name"],
+            tool_call_dumped["args"],
+            tool_call_dumped["id"],
+        )
+        try:
+            assert self.session is not None
+            tool_response: CallToolResult = await self.session.call_tool(tool_name, tool_args)
+            logger.info(f"[CLIENT] Called tool {tool_name}. Error: {tool_response.isError}")
+
+            ##### first check types. Currently, content allows text only
+            assert isinstance(tool_response.content[0], TextContent)
+            assert tool_response.content[0].type == "text"
+            assert tool_response.content[0].text
+            assert tool_response.structuredContent is None or isinstance(
+                tool_response.structuredContent, dict
+            )
+
+            return tool_response
 
         # error handling. No return
-        except MCPError:
-            # raise MCPErrors coming from lower levels
-            raise
         except Exception as error:
             error_message = (
                 f"[CLIENT] {MCPErrorCode.TOOLING} Calling tools failed. "
@@ -279,7 +307,6 @@ class MCPClient(BaseMCPClient):
                 logger.error(error_message, exc_info=False)
             raise MCPError(error_message, code=MCPErrorCode.TOOLING) from error
 
-
 if __name__ == "__main__":
 
     async def main():
@@ -0,0 +1,241 @@
+import asyncio
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Set, Tuple
+
+from mcp.types import CallToolResult
+
+from agents.containers.utils import BackgroundEventLoop
+from agents.mcp_client.client import MCPClient
+from agents.models.client import MCPToolDecision
+
+logger = logging.getLogger(__name__)
+
+# one persistent loop (started on first use) for all mcp I/O; sessions are bound to it
+MCP_LOOP = BackgroundEventLoop(name="mcp-loop")
+
+# coalescing of toolcalls per server: calls arriving within the window are sent as one batch
+_BATCH_WINDOW_SECONDS: float = 0.002
+_MAX_BATCH_SIZE: int = 32
+
+# max. wait for the liveness ping after failed toolcalls
+_PING_TIMEOUT_SECONDS: float = 5.0
+
+# max. wait for closing connections (interpreter exit must not hang on a dead server)
+_CLOSE_TIMEOUT_SECONDS: float = 5.0
+
+# open sessions without toolcalls for this long are closed by their owner task (reopened on next use)
+_IDLE_TIMEOUT_SECONDS: float = 300.0
+
+# process-wide sessions per server url, shared by all containers (LRU: server urls may come from request payloads)
+_MAX_CONNECTIONS: int = 32
+_CONNECTIONS: OrderedDict[str, "MCPConnection"] = OrderedDict()
+_CONNECTIONS_LOCK = threading.Lock()
+# closing of evicted connections started on the mcp loop (strong refs until done)
+_CLOSING: Set[asyncio.Task] = set()
+
+
+class MCPConnection:
+    """Persistent MCP session to one server, shared process-wide (see get_connection).
+
+    Connected lazily on first call. The sse/session contexts of MCPClient must be entered and exited
+    in the same task, hence a dedicated owner task opens the connection, holds it until aclose() or until
+    it was idle for _IDLE_TIMEOUT_SECONDS, and closes it; tool calls (own tasks) only use the open session.
+    Toolcalls arriving within a short window (e.g. parallel toolcalls of one agent step) are coalesced
+    into one call_tools batch, calls run concurrently over the session. No ping per batch: only after failed
+    toolcalls the session is checked, and dropped if dead (next call reopens it via the owner task).
+    """
+
+    def __init__(self, server_url: str) -> None:
+        self.client = MCPClient(mcp_server_endpoint=server_url)
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._owner: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._pending: List[Tuple[MCPToolDecision, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._dispatches: Set[asyncio.Task] = set()
+        self._last_used: float = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        # stop set: owner task is closing the session, no new calls on it
+        return self._owner is not None and not self._owner.done() and self._stop is not None and not self._stop.is_set()
+
+    async def call_tools(self, tooling_decision: List[MCPToolDecision]) -> List[CallToolResult]:
+        """Call tools over the persistent session (connects on first use)."""
+        if not MCP_LOOP.in_loop_thread():
+            # other loop (direct async call, nested fallback): session is bound to the mcp loop -> one-off connection
+            return await MCPClient(mcp_server_endpoint=self.client.mcp_endpoint).call_tools(tooling_decision)
+
+        loop = asyncio.get_running_loop()
+        await self._ensure_connected(loop)
+        futures = [self._submit(decision, loop) for decision in tooling_decision]
+        return list(await asyncio.gather(*futures))
+
+    def _submit(self, decision: MCPToolDecision, loop: asyncio.AbstractEventLoop) -> asyncio.Future:
+        """Queue toolcall for the next batch; flush when full, otherwise after the batch window."""
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((decision, future))
+        self._last_used = loop.time()
+        if len(self._pending) >= _MAX_BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(_BATCH_WINDOW_SECONDS, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[MCPToolDecision, asyncio.Future]]) -> None:
+        """Send one batch, hand each outcome (result or per-call error) to its caller."""
+        try:
+            # session may have been dropped meanwhile (failed batch, teardown)
+            await self._ensure_connected(asyncio.get_running_loop())
+            owner = self._owner
+            outcomes = await self.client.call_tools(
+                [decision for decision, _ in batch], keep_open=True, return_exceptions=True
+            )
+        except Exception as error:
+            # connection-level failure: whole batch fails, drop session (next call connects fresh)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            await self.aclose()
+            return
+
+        failed = False
+        for (_, future), outcome in zip(batch, outcomes):
+            failed = failed or isinstance(outcome, BaseException)
+            if future.done():
+                continue  # caller cancelled
+            if isinstance(outcome, BaseException):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+        # failed toolcalls may stem from a dead session: drop it (unless already replaced meanwhile)
+        if failed and self._owner is owner and not await self._session_alive():
+            logger.warning("[MCP CONNECTION] Session to %s is dead, dropping it.", self.client.mcp_endpoint)
+            await self.aclose()
+
+    async def _session_alive(self) -> bool:
+        """Ping the open session (bounded wait)."""
+        session = self.client.session
+        if session is None:
+            return False
+        try:
+            await asyncio.wait_for(session.send_ping(), timeout=_PING_TIMEOUT_SECONDS)
+        except Exception:
+            return False
+        return True
+
+    async def _ensure_connected(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.is_open:
+                return
+            if self._owner is not None and not self._owner.done():
+                # previous session still closing (idle, dropped): client is reused, wait until it is closed
+                await asyncio.gather(self._owner, return_exceptions=True)
+            ready: asyncio.Future = loop.create_future()
+            self._stop = asyncio.Event()
+            self._owner = loop.create_task(self._hold_connection(ready, self._stop))
+            await ready
+
+    async def _hold_connection(self, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        """Owner task: connect, keep session open until stop is set or idle timeout, then close (same task)."""
+        try:
+            await self.client.connect()
+        except Exception as error:
+            ready.set_exception(error)
+            return
+        ready.set_result(None)
+        loop = asyncio.get_running_loop()
+        self._last_used = loop.time()
+        try:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=_IDLE_TIMEOUT_SECONDS)
+                except asyncio.TimeoutError:
+                    idle = not self._pending and not self._dispatches
+                    if idle and loop.time() - self._last_used >= _IDLE_TIMEOUT_SECONDS:
+                        logger.info("[MCP CONNECTION] Closing idle session to %s.", self.client.mcp_endpoint)
+                        stop.set()
+        finally:
+            await self.client.close()
+
+    async def aclose(self) -> None:
+        """Close the session (no-op if not connected)."""
+        owner, stop = self._owner, self._stop
+        if owner is None or stop is None:
+            return
+        # owner stays referenced until closed: a concurrent reconnect waits for it (see _ensure_connected)
+        stop.set()
+        await asyncio.gather(owner, return_exceptions=True)
+
+
+async def aclose_connections(connections: Iterable[MCPConnection]) -> None:
+    """Close sessions concurrently (run on the mcp loop)."""
+    await asyncio.gather(*(connection.aclose() for connection in connections), return_exceptions=True)
+
+
+def close_connections(connections: Iterable[MCPConnection]) -> None:
+    """Close open sessions on the mcp loop, blocking (bounded) unless called from the loop thread itself."""
+    open_connections = [connection for connection in connections if connection.is_open]
+    if not open_connections:
+        return
+    future = MCP_LOOP.submit(aclose_connections(open_connections))
+    if not MCP_LOOP.in_loop_thread():
+        try:
+            future.result(timeout=_CLOSE_TIMEOUT_SECONDS)
+        except Exception:
+            logger.warning("[MCP CONNECTION] Closing of MCP sessions did not finish cleanly.")
+
+
+def get_connection(server_url: str) -> MCPConnection:
+    """Return the shared connection of a server (created on first request, connected on first use).
+
+    At most _MAX_CONNECTIONS servers are kept; the least recently used connection is evicted and closed.
+    """
+    evicted: Optional[MCPConnection] = None
+    with _CONNECTIONS_LOCK:
+        connection = _CONNECTIONS.get(server_url)
+        if connection is not None:
+            _CONNECTIONS.move_to_end(server_url)
+            return connection
+        connection = _CONNECTIONS[server_url] = MCPConnection(server_url)
+        if len(_CONNECTIONS) > _MAX_CONNECTIONS:
+            _, evicted = _CONNECTIONS.popitem(last=False)
+
+    if evicted is not None and evicted.is_open:
+        logger.info("[MCP CONNECTION] Evicting session to %s.", evicted.client.mcp_endpoint)
+        _close_evicted(evicted)
+    return connection
+
+
+def _close_evicted(connection: MCPConnection) -> None:
+    """Close evicted connection on the mcp loop without blocking the caller."""
+    if MCP_LOOP.in_loop_thread():
+        task = asyncio.get_running_loop().create_task(connection.aclose())
+        _CLOSING.add(task)
+        task.add_done_callback(_CLOSING.discard)
+    else:
+        MCP_LOOP.submit(connection.aclose())
+
+
+def close_all_connections() -> None:
+    """Close all shared sessions (registered for interpreter exit)."""
+    close_connections(list(_CONNECTIONS.values()))
+
+
+atexit.register(close_all_connections)
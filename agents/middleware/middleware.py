@@ -67,6 +67,15 @@ class LoggingMiddlewareSync(AgentMiddleware):
                 )
         return None
 
+    # async twins: under ainvoke/astream the hooks run inline on the event loop (no executor hop per model call)
+    async def abefore_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        """Logs before model calls (async path)."""
+        return self.before_model(state, runtime)
+
+    async def aafter_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        """Logs after model calls (async path)."""
+        return self.after_model(state, runtime)
+
 ############################################################### evaluate toolcalls for error handling
 class AbortOnToolErrors(AgentMiddleware):
     """Checks results of toolcalls for error categories. Returns error marker for abortion cases."""
@@ -99,6 +108,11 @@ class AbortOnToolErrors(AgentMiddleware):
                 }
         return None
 
+    @hook_config(can_jump_to=["end"])
+    async def abefore_model(self, state: AgentState, runtime) -> dict[str, Any] | None:
+        """Async path of before_model (runs inline on the event loop)."""
+        return self.before_model(state, runtime)
+
 ############################################################### Count Modelcalls
 class ModelCallCounterMiddlewareSync(AgentMiddleware[CustomStateShared]):
     """Counts model calls."""
@@ -124,6 +138,10 @@ class ModelCallCounterMiddlewareSync(AgentMiddleware[CustomStateShared]):
         )
         return {"model_call_count": count + 1}
 
+    async def aafter_model(self, state: CustomStateShared, runtime) -> dict[str, Any] | None:
+        """Async path of after_model (runs inline on the event loop)."""
+        return self.after_model(state, runtime)
+
 ############################################################### Count Modelcalls
 class OnlyOneModelCallMiddlewareSync(AgentMiddleware[CustomStateShared]):
     """Enforces that the agent performs at most one model call during a run.
@@ -164,6 +182,11 @@ class OnlyOneModelCallMiddlewareSync(AgentMiddleware[CustomStateShared]):
                 "jump_to": "end"}
         return None
 
+    @hook_config(can_jump_to=["end"])
+    async def abefore_model(self, state: CustomStateShared, runtime) -> dict[str, Any] | None:
+        """Async path of before_model (runs inline on the event loop)."""
+        return self.before_model(state, runtime)
+
 ############################################################### limit toolcalls globally
 def global_toolcall_limit_sync(max_toolcalls: int):
     """Creates a synchronous middleware that limits how many tool calls an agent may perform in a run.
@@ -256,8 +279,9 @@ def override_final_agentprompt_async(
         return original_response
 
 
+    # async like the wrapped model call above: no executor hop after each model node under astream
     @after_model(state_schema=CustomStateShared)
-    def document_final_prompt(
+    async def document_final_prompt(
         state: CustomStateShared, runtime: Runtime
     ) -> dict[str, Any]:
         """If last message was generated (after prompt switch), mark prompt as switched."""
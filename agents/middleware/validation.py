@@ -65,10 +65,10 @@ class AgentResponseValidator:
         chain = prompt | llm_with_structured_output
         return chain
 
-    def _validate_usability_of_direct_answer(self, agent_response: str) -> ValidationOutput:
-        """Validate AIMessage for useability."""
+    async def _validate_usability_of_direct_answer(self, agent_response: str) -> ValidationOutput:
+        """Validate AIMessage for useability (awaited llm call, does not block the event loop of the stream)."""
         chain = self._build_usability_chain()
-        result: ValidationOutput = chain.invoke(
+        result: ValidationOutput = await chain.ainvoke(
             {
                 "agent_text": agent_response,
             }
@@ -121,7 +121,7 @@ class AgentResponseValidator:
         if answer_type == LoopStatus.DIRECT_ANSWER:
             if self.system_prompt_usability_directanswer:
                 logger.info("[VALIDATION] Validating direct answer")
-                usability_check = self._validate_usability_of_direct_answer(last_message.text)
+                usability_check = await self._validate_usability_of_direct_answer(last_message.text)
                 if not usability_check.usable:
                     return ValidatedAgentResponse(
                         response = None,
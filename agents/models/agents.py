@@ -17,7 +17,7 @@ MiddlewareT: TypeAlias = AgentMiddleware[AgentState[Any], None]
 
 class AgentBehaviourConfig(BaseModel):
     """Configuration for an agent."""
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
 
     name: str
     description: str = ""
@@ -30,7 +30,8 @@ class AgentBehaviourConfig(BaseModel):
 
 
 class CompleteAgentConfig(BaseModel):
-    """Type for entries of agent registry."""
+    """Type for entries of agent registry. Frozen, so instances can be shared safely."""
+    model_config = ConfigDict(frozen=True)
 
     description: str
     behaviour_config: AgentBehaviourConfig
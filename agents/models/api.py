@@ -2,7 +2,7 @@ from typing import List, Literal
 
 from pydantic import BaseModel
 
-from agents.models.agents import AgentBehaviourConfig
+from agents.models.agents import AgentBehaviourConfig, CompleteAgentConfig
 from agents.models.tools import ToolSchema
 from enum import Enum
 
@@ -22,3 +22,8 @@ class StreamAgentRequest(BaseModel):
     messages: List[ChatMessage]
     agent_config: AgentBehaviourConfig
     tool_schemas: List[ToolSchema]
+
+class PreparedStreamRequest(BaseModel):
+    """StreamAgentRequest with agent config already wrapped at request ingress."""
+    messages: List[ChatMessage]
+    complete_config: CompleteAgentConfig
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from agents.factory.utils import MIN_STREAM_SLEEP, artificial_ndjson_stream, ndjson_prefix
+
+PREFIX = ndjson_prefix("outer", "text_final")
+
+
+async def _collect(answer: str, **kwargs) -> list[bytes]:
+    kwargs.setdefault("pause", MIN_STREAM_SLEEP)
+    kwargs.setdefault("growth", 2)
+    return [record async for record in artificial_ndjson_stream(PREFIX, answer, **kwargs)]
+
+
+def _assert_valid_ndjson(records: list[bytes], answer: str) -> None:
+    texts = []
+    for record in records:
+        assert record.endswith(b"\n") and record.count(b"\n") == 1
+        parsed = json.loads(record)
+        assert parsed["level"] == "outer"
+        assert parsed["type"] == "text_final"
+        texts.append(parsed["data"])
+
+    # chunks carry their separating space, joined they give the answer with normalized whitespace
+    assert all(text.endswith(" ") for text in texts[:-1])
+    assert "".join(texts) == " ".join(answer.split())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "answer",
+    [
+        'He said "hello" and "bye"',
+        "path C:\\temp\\new and a \\ alone",
+        "control\x01chars\x1f and\ttab\nnewline",
+        "Grüße aus Köln 😀 — 日本語 テキスト",
+        'mixed "ä\\ö" \x07 end',
+    ],
+)
+async def test_records_round_trip_to_valid_ndjson(answer):
+    records = await _collect(answer)
+
+    assert len(records) > 1
+    _assert_valid_ndjson(records, answer)
+
+
+@pytest.mark.asyncio
+async def test_without_pause_answer_is_one_record():
+    answer = 'one "quoted" \\ answer'
+    records = await _collect(answer, pause=0)
+
+    assert len(records) == 1
+    _assert_valid_ndjson(records, answer)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("answer", ["", "   \n\t "])
+async def test_empty_answer_yields_no_records(answer):
+    assert await _collect(answer) == []
@@ -0,0 +1,74 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+
+import pytest
+
+from agents.containers.utils import BackgroundEventLoop
+
+_request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="")
+
+
+@pytest.fixture
+def background_loop():
+    loop = BackgroundEventLoop(name="test-loop")
+    yield loop
+    loop.close()
+
+
+def test_run_returns_result_in_callers_context(background_loop):
+    async def read_context() -> str:
+        return _request_id.get()
+
+    _request_id.set("req-1")
+    assert background_loop.run(read_context()) == "req-1"
+
+
+def test_cancelling_future_cancels_task_on_loop(background_loop):
+    started, cancelled, finished = threading.Event(), threading.Event(), threading.Event()
+
+    async def long_call() -> None:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+            finished.set()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    future = background_loop.submit(long_call())
+    assert started.wait(timeout=1)
+    future.cancel()
+
+    assert cancelled.wait(timeout=1)
+    assert not finished.is_set()
+    with pytest.raises(concurrent.futures.CancelledError):
+        future.result(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_awaiting_task_cancels_call_on_loop(background_loop):
+    started, cancelled = threading.Event(), threading.Event()
+
+    async def long_call() -> None:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    # e.g. agent run on the server loop, tool call on the background loop
+    caller = asyncio.create_task(background_loop.arun(long_call()))
+    await asyncio.to_thread(started.wait, 1)
+    caller.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    assert await asyncio.to_thread(cancelled.wait, 1)
+
+
+def test_non_coroutine_is_rejected(background_loop):
+    with pytest.raises(TypeError):
+        background_loop.submit(object())  # type: ignore[arg-type]
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from agents.api.utils import buffered_stream
+
+
+async def _records(count: int, error: Exception | None = None):
+    for index in range(count):
+        yield b'{"index": %d}\n' % index
+        await asyncio.sleep(0)
+    if error is not None:
+        raise error
+
+
+@pytest.mark.asyncio
+async def test_all_records_arrive_in_order():
+    chunks = [chunk async for chunk in buffered_stream(_records(50), maxsize=4)]
+
+    assert b"".join(chunks) == b"".join(b'{"index": %d}\n' % index for index in range(50))
+
+
+@pytest.mark.asyncio
+async def test_producer_error_reaches_consumer():
+    received = []
+    with pytest.raises(RuntimeError, match="agent run failed"):
+        async for chunk in buffered_stream(_records(3, RuntimeError("agent run failed"))):
+            received.append(chunk)
+
+    assert b"".join(received).count(b"\n") == 3
+
+
+@pytest.mark.asyncio
+async def test_producer_cancelled_when_consumer_closes_early():
+    source_closed = asyncio.Event()
+
+    async def endless():
+        try:
+            while True:
+                yield b"{}\n"
+                await asyncio.sleep(0)
+        finally:
+            source_closed.set()
+
+    stream = buffered_stream(endless(), maxsize=2)
+    assert (await stream.__anext__()).startswith(b"{}\n")
+    await stream.aclose()
+
+    # closing the consumer cancels the producer, which closes the agent run
+    await asyncio.wait_for(source_closed.wait(), timeout=1)
@@ -0,0 +1,179 @@
+import asyncio
+from collections import OrderedDict
+from typing import List
+
+import pytest
+
+from agents.mcp_client import registry
+from agents.mcp_client.registry import MCPConnection
+from agents.models.client import MCPError, MCPErrorCode, MCPToolDecision
+
+
+class _FakeSession:
+    def __init__(self, alive: bool = True) -> None:
+        self.alive = alive
+        self.pings = 0
+
+    async def send_ping(self) -> None:
+        self.pings += 1
+        if not self.alive:
+            raise ConnectionError("session closed")
+
+
+class _FakeClient:
+    """Stands in for MCPClient: records batches, fails selected toolcalls or whole batches."""
+
+    def __init__(self, failing_tools=(), batch_error=None, alive: bool = True) -> None:
+        self.mcp_endpoint = "http://fake/sse"
+        self.session = None
+        self.alive = alive
+        self.failing_tools = set(failing_tools)
+        self.batch_error = batch_error
+        self.batches: List[List[str]] = []
+        self.connects = 0
+
+    async def connect(self) -> bool:
+        self.connects += 1
+        self.session = _FakeSession(alive=self.alive)
+        return True
+
+    async def close(self) -> bool:
+        self.session = None
+        return True
+
+    async def call_tools(self, tooling_decision, keep_open=False, return_exceptions=False):
+        assert keep_open and return_exceptions
+        self.batches.append([decision.name for decision in tooling_decision])
+        if self.batch_error is not None:
+            raise self.batch_error
+        return [
+            MCPError(f"{decision.name} failed", code=MCPErrorCode.TOOLING)
+            if decision.name in self.failing_tools
+            else f"result of {decision.name}"
+            for decision in tooling_decision
+        ]
+
+
+def _decision(name: str) -> MCPToolDecision:
+    return MCPToolDecision.model_validate({"name": name, "args": {}, "id": name})
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    # tests run on their own loop; pretend it is the mcp loop (persistent session path)
+    monkeypatch.setattr(registry.MCP_LOOP, "in_loop_thread", lambda: True)
+    return MCPConnection("http://fake/sse")
+
+
+@pytest.mark.asyncio
+async def test_calls_within_window_are_coalesced(connection):
+    client = connection.client = _FakeClient()
+
+    results = await asyncio.gather(
+        connection.call_tools([_decision("a")]),
+        connection.call_tools([_decision("b")]),
+        connection.call_tools([_decision("c"), _decision("d")]),
+    )
+
+    assert results == [["result of a"], ["result of b"], ["result of c", "result of d"]]
+    assert client.batches == [["a", "b", "c", "d"]]
+    assert client.connects == 1
+    await connection.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failing_call_does_not_affect_batch(connection):
+    client = connection.client = _FakeClient(failing_tools={"b"})
+
+    results = await asyncio.gather(
+        connection.call_tools([_decision("a")]),
+        connection.call_tools([_decision("b")]),
+        connection.call_tools([_decision("c")]),
+        return_exceptions=True,
+    )
+
+    assert results[0] == ["result of a"]
+    assert isinstance(results[1], MCPError)
+    assert results[2] == ["result of c"]
+    assert len(client.batches) == 1
+    await asyncio.gather(*connection._dispatches)
+    # session answered the ping after the failure -> stays open
+    assert connection.is_open
+    assert client.session.pings == 1
+    await connection.aclose()
+
+
+@pytest.mark.asyncio
+async def test_no_ping_on_success_and_dead_session_is_dropped(connection):
+    client = connection.client = _FakeClient(failing_tools={"b"}, alive=False)
+
+    assert await connection.call_tools([_decision("a")]) == ["result of a"]
+    assert client.session.pings == 0
+
+    with pytest.raises(MCPError):
+        await connection.call_tools([_decision("b")])
+    # callers are answered first, the liveness check finishes in the dispatch task
+    await asyncio.gather(*connection._dispatches)
+    # failed call, ping failed -> session dropped by its owner task
+    assert not connection.is_open
+    assert client.session is None
+
+
+@pytest.mark.asyncio
+async def test_connection_failure_reaches_all_pending_calls(connection):
+    error = MCPError("connection lost", code=MCPErrorCode.CLIENT)
+    client = connection.client = _FakeClient(batch_error=error)
+
+    results = await asyncio.gather(
+        connection.call_tools([_decision("a")]),
+        connection.call_tools([_decision("b"), _decision("c")]),
+        return_exceptions=True,
+    )
+
+    assert results == [error, error]
+    assert client.batches == [["a", "b", "c"]]
+    # session dropped; next call reconnects via owner task
+    assert not connection.is_open
+    assert client.session is None
+
+    client.batch_error = None
+    assert await connection.call_tools([_decision("d")]) == ["result of d"]
+    assert client.connects == 2
+    await connection.aclose()
+
+
+@pytest.mark.asyncio
+async def test_idle_session_is_closed_and_reopened(connection, monkeypatch):
+    monkeypatch.setattr(registry, "_IDLE_TIMEOUT_SECONDS", 0.05)
+    client = connection.client = _FakeClient()
+
+    assert await connection.call_tools([_decision("a")]) == ["result of a"]
+    await asyncio.sleep(0.3)
+    assert not connection.is_open
+    assert client.session is None
+
+    assert await connection.call_tools([_decision("b")]) == ["result of b"]
+    assert client.connects == 2
+    await connection.aclose()
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_connection_is_evicted_and_closed(connection, monkeypatch):
+    monkeypatch.setattr(registry, "_CONNECTIONS", OrderedDict())
+    monkeypatch.setattr(registry, "_MAX_CONNECTIONS", 2)
+    monkeypatch.setattr(registry, "MCPClient", lambda mcp_server_endpoint: _FakeClient())
+
+    first = registry.get_connection("http://first/sse")
+    second = registry.get_connection("http://second/sse")
+    await first.call_tools([_decision("a")])
+    await second.call_tools([_decision("b")])
+
+    # touch first -> second is least recently used
+    assert registry.get_connection("http://first/sse") is first
+    registry.get_connection("http://third/sse")
+    await asyncio.gather(*registry._CLOSING)
+
+    assert list(registry._CONNECTIONS) == ["http://first/sse", "http://third/sse"]
+    assert not second.is_open
+    assert first.is_open
+    await first.aclose()
@@ -0,0 +1,41 @@
+import pytest
+
+from agents.containers.mcp_tools import _MISSING, _make_arg_mapper
+
+# (name_for_llm, name_on_server, required, default or _MISSING)
+ARG_MAPPINGS = (
+    ("name", "user_name", True, _MISSING),
+    ("limit", "max_items", False, _MISSING),  # DROP marker: server fills it
+    ("language", "lang", False, "de"),  # schema default
+)
+
+map_server_args = _make_arg_mapper(ARG_MAPPINGS)
+
+
+def test_all_args_provided_are_forwarded_under_server_names():
+    assert map_server_args({"name": "Patrick", "limit": 3, "language": "en"}) == {
+        "user_name": "Patrick",
+        "max_items": 3,
+        "lang": "en",
+    }
+
+
+def test_missing_required_arg_raises():
+    with pytest.raises(ValueError, match="Missing required LLM argument 'name'"):
+        map_server_args({"limit": 3})
+
+
+def test_provided_none_counts_as_provided():
+    assert map_server_args({"name": None}) == {"user_name": None, "lang": "de"}
+
+
+def test_drop_marker_arg_is_omitted_if_not_provided():
+    assert "max_items" not in map_server_args({"name": "Patrick"})
+
+
+def test_schema_default_is_used_if_not_provided():
+    assert map_server_args({"name": "Patrick"}) == {"user_name": "Patrick", "lang": "de"}
+
+
+def test_unknown_llm_args_are_ignored():
+    assert map_server_args({"name": "Patrick", "other": 1}) == {"user_name": "Patrick", "lang": "de"}
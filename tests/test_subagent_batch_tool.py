@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agents.containers.subagents import AgentAsToolContainer
+
+
+def _fake_agent(name: str) -> SimpleNamespace:
+    return SimpleNamespace(name=name, description=f"Fake agent {name}.", initial_state={}, agent=None)
+
+
+def test_batch_tools_are_opt_in():
+    default = AgentAsToolContainer(agents=[_fake_agent("INNER")])
+    assert list(default.subagents) == ["run_INNER"]
+    assert default.subagents_batch_raw == {}
+
+    with_batch = AgentAsToolContainer(agents=[_fake_agent("INNER")], batch_tools=True)
+    assert list(with_batch.subagents) == ["run_INNER", "run_INNER_batch"]
+    assert list(with_batch.subagents_batch_raw) == ["run_INNER_batch"]
+
+
+@pytest.mark.asyncio
+async def test_batch_answers_every_subquery_in_order_within_concurrency_limit():
+    container = AgentAsToolContainer(agents=[], batch_concurrency=2)
+    running, max_running = 0, 0
+
+    async def core(user_query: str) -> str:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return user_query.upper()
+
+    run_batch = container._build_batch_tool(core=core, batch_name="run_INNER_batch")
+    result = await run_batch(["a", "b", "c", "d", "e"])
+
+    assert result == "\n\n".join(f"SUBQUERY: {query}\nANSWER: {query.upper()}" for query in "abcde")
+    assert max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_subquery_is_reported_without_detaching_others():
+    container = AgentAsToolContainer(agents=[], batch_concurrency=2)
+    finished = []
+
+    async def core(user_query: str) -> str:
+        if user_query == "bad":
+            raise RuntimeError("subagent failed")
+        await asyncio.sleep(0.01)
+        finished.append(user_query)
+        return f"answer {user_query}"
+
+    run_batch = container._build_batch_tool(core=core, batch_name="run_INNER_batch")
+    result = await run_batch(["one", "bad", "two", "three"])
+
+    # all other subqueries completed before the tool returned
+    assert sorted(finished) == ["one", "three", "two"]
+    assert "SUBQUERY: one\nANSWER: answer one" in result
+    assert "SUBQUERY: bad\nERROR: Subquery failed (RuntimeError)" in result
+    assert "SUBQUERY: three\nANSWER: answer three" in result
@@ -0,0 +1,66 @@
+import pytest
+
+from agents.containers import utils
+from agents.containers.utils import SubagentResultCache
+
+
+class _Clock:
+    """Controllable replacement for time.monotonic."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(utils.time, "monotonic", clock)
+    return clock
+
+
+def test_cache_hit_with_normalized_query():
+    cache = SubagentResultCache()
+    cache.set(cache.make_key("run_INNER", 1, "Add 2  and 5"), "7")
+
+    assert cache.get(cache.make_key("run_INNER", 1, "  add 2 and 5 ")) == "7"
+    assert cache.get(cache.make_key("run_INNER", 1, "add 2 and 6")) is None
+
+
+def test_cache_separates_agents_of_same_name():
+    cache = SubagentResultCache()
+    cache.set(cache.make_key("run_Test", 1, "query"), "answer of agent 1")
+
+    assert cache.get(cache.make_key("run_Test", 2, "query")) is None
+    assert cache.get(cache.make_key("run_Test", 1, "query")) == "answer of agent 1"
+
+
+def test_cache_entry_expires_after_ttl(clock):
+    cache = SubagentResultCache(ttl=10)
+    key = cache.make_key("run_INNER", 1, "query")
+    cache.set(key, "answer")
+
+    clock.now += 10
+    assert cache.get(key) == "answer"
+
+    clock.now += 0.1
+    assert cache.get(key) is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SubagentResultCache(maxsize=2)
+    key_a, key_b, key_c = (cache.make_key("run_INNER", 1, query) for query in ("a", "b", "c"))
+    cache.set(key_a, "A")
+    cache.set(key_b, "B")
+
+    # touch a -> b is least recently used
+    assert cache.get(key_a) == "A"
+    cache.set(key_c, "C")
+
+    assert len(cache) == 2
+    assert cache.get(key_b) is None
+    assert cache.get(key_a) == "A"
+    assert cache.get(key_c) == "C"